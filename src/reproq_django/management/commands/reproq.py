@@ -1,34 +1,195 @@
 import os
 import re
 import shlex
+import string
 import subprocess
 import sys
 import platform
 import shutil
-import urllib.request
 import tempfile
 import hashlib
+import codecs
 import json
 import tomllib
+import functools
 import importlib.resources
 from datetime import timedelta
+from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlparse
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.db import connection, connections
-from django.db.models import Q
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Count, Q, Subquery
 from django.utils import timezone
-from ...models import PeriodicTask, TaskRun, QueueControl
+from ...models import PeriodicTask, TaskRun, QueueControl, Worker
 from ...db import default_db_alias, parse_result_id, queue_db_aliases
 from ...recurring import sync_recurring_tasks
 
+WORKER_FLAGS = frozenset(
+    {
+        "--config",
+        "--concurrency",
+        "--queues",
+        "--queue",
+        "--allowed-task-modules",
+        "--database",
+        "--logs-dir",
+        "--payload-mode",
+        "--metrics-port",
+        "--metrics-addr",
+        "--metrics-auth-token",
+        "--metrics-allow-cidrs",
+        "--metrics-tls-cert",
+        "--metrics-tls-key",
+        "--metrics-tls-client-ca",
+        "--metrics-auth-limit",
+        "--metrics-auth-window",
+        "--metrics-auth-max-entries",
+    }
+)
+BEAT_FLAGS = frozenset({"--config", "--interval", "--once", "--database"})
+
+_PG_CRON_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_]+")
+
+_DURATION_RE = re.compile(r"^\s*(\d+)\s*([smhd])\s*$")
+_DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+# Release asset naming for the host platform; none of this changes at runtime.
+_SYSTEM = platform.system().lower()
+_ARCH = {"x86_64": "amd64", "aarch64": "arm64"}.get(
+    platform.machine().lower(), platform.machine().lower()
+)
+_EXE_SUFFIX = ".exe" if _SYSTEM == "windows" else ""
+_BIN_NAME = f"reproq-{_SYSTEM}-{_ARCH}{_EXE_SUFFIX}"
+_PKG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HOSTNAME = platform.node() or "worker"
+_VERSION_PROBE_TIMEOUT = 10
+_DSN_TEMPLATE = "postgres://{user}:{password}@{host}:{port}/{name}".format
+
+# systemd units written by `reproq systemd`. $env_block and $service_tail carry
+# their own trailing newlines so optional sections collapse cleanly.
+_SYSTEMD_SERVICE_TEMPLATE = string.Template(
+    """[Unit]
+Description=Reproq $title - $project
+After=network.target postgresql.service
+
+[Service]
+Type=$service_type
+User=$user
+Group=$group
+WorkingDirectory=$cwd
+${env_block}ExecStart=$cmd
+$service_tail
+[Install]
+WantedBy=multi-user.target
+"""
+)
+_SYSTEMD_TIMER_TEMPLATE = string.Template(
+    """[Unit]
+Description=Reproq $title Timer - $project
+
+[Timer]
+OnCalendar=$on_calendar
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+"""
+)
+
+# Recorded in reproq_schema_meta after migrate-worker succeeds. Bump whenever the
+# worker SQL in run_migrate changes so existing databases pick it up.
+WORKER_SCHEMA_VERSION = 2
+
+# Tables the Go worker expects; checked by doctor and migrate-worker.
+_REQUIRED_TABLES = (
+    "task_runs",
+    "periodic_tasks",
+    "reproq_workers",
+    "rate_limits",
+    "workflow_runs",
+    "reproq_queue_controls",
+)
+
+
+# Read-only default for lookups into optional config sections.
+_EMPTY_MAP = MappingProxyType({})
+
+# Bit flags returned by _classify_path for _mask_value.
+_PATH_DSN = 1
+_PATH_TOKEN = 2
+
+# (pattern, flag) redaction rules matched case-insensitively against dotted
+# config paths. Add new secret-bearing keys here.
+_REDACT_RULES = (
+    (re.compile(r"dsn", re.IGNORECASE), _PATH_DSN),
+    (re.compile(r"auth_token|token\Z", re.IGNORECASE), _PATH_TOKEN),
+)
+
+
+def _seek_read(fd, length, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+# os.pread is POSIX-only; Windows falls back to seek + read on the same fd.
+_pread = getattr(os, "pread", _seek_read)
+
+
+@functools.lru_cache(maxsize=512)
+def _classify_path(path):
+    category = 0
+    for pattern, flag in _REDACT_RULES:
+        if pattern.search(path):
+            category |= flag
+    return category
+
+
+def _run_version_probe(worker_bin):
+    # Bounded so a wedged or wrong-architecture binary can't hang check/doctor.
+    return (
+        subprocess.check_output([worker_bin, "--version"], timeout=_VERSION_PROBE_TIMEOUT)
+        .decode()
+        .strip()
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_version_probe(path, stat_key):
+    # stat_key pins the entry to one build of the file at ``path``; replacing
+    # the binary changes it, so a stale version is never reported.
+    return _run_version_probe(path)
+
+
 class Command(BaseCommand):
     help = "Unified Reproq management command"
 
+    # (flag, option key, unset value) forwarded to the Go worker. With a config
+    # file only explicitly passed flags are forwarded; otherwise any value that
+    # differs from its unset value is.
+    _WORKER_FLAG_MAP = (
+        ("--concurrency", "concurrency", None),
+        ("--logs-dir", "logs_dir", ""),
+        ("--payload-mode", "payload_mode", ""),
+        ("--metrics-port", "metrics_port", 0),
+        ("--metrics-addr", "metrics_addr", ""),
+        ("--metrics-auth-token", "metrics_auth_token", ""),
+        ("--metrics-allow-cidrs", "metrics_allow_cidrs", ""),
+        ("--metrics-tls-cert", "metrics_tls_cert", ""),
+        ("--metrics-tls-key", "metrics_tls_key", ""),
+        ("--metrics-tls-client-ca", "metrics_tls_client_ca", ""),
+        ("--metrics-auth-limit", "metrics_auth_limit", None),
+        ("--metrics-auth-window", "metrics_auth_window", ""),
+        ("--metrics-auth-max-entries", "metrics_auth_max_entries", None),
+    )
+
     def add_arguments(self, parser):
         subparsers = parser.add_subparsers(dest="subcommand", required=True)
 
         # Worker
         worker_parser = subparsers.add_parser("worker", help="Start the Go worker")
+        worker_parser.set_defaults(handler=functools.partial(self.run_worker_or_beat, "worker"))
         worker_parser.add_argument("--config", type=str, default="", help="Path to reproq config file")
         worker_parser.add_argument("--concurrency", type=int, default=10)
         worker_parser.add_argument("--queues", type=str, default="", help="Comma-separated queue names")
@@ -47,27 +208,33 @@ class Command(BaseCommand):
         worker_parser.add_argument("--metrics-auth-limit", type=int, default=None, help="Unauthorized request limit per window")
         worker_parser.add_argument("--metrics-auth-window", type=str, default="", help="Rate limit window (e.g. 1m)")
         worker_parser.add_argument("--metrics-auth-max-entries", type=int, default=None, help="Max tracked hosts for auth rate limiting")
+        worker_parser.add_argument("--no-exec", action="store_true", help="Run the worker as a child process instead of replacing this process")
 
         # Beat
         beat_parser = subparsers.add_parser("beat", help="Start the periodic task scheduler (beat)")
+        beat_parser.set_defaults(handler=functools.partial(self.run_worker_or_beat, "beat"))
         beat_parser.add_argument("--config", type=str, default="", help="Path to reproq config file")
         beat_parser.add_argument("--interval", type=str, default="30s")
         beat_parser.add_argument("--once", action="store_true", help="Enqueue due periodic tasks once and exit")
         beat_parser.add_argument("--database", type=str, default="", help="Django database alias for beat DSN")
+        beat_parser.add_argument("--no-exec", action="store_true", help="Run beat as a child process instead of replacing this process")
 
         schedule_parser = subparsers.add_parser(
             "schedule",
             help="Enqueue due periodic tasks once and exit (cron-friendly)",
         )
+        schedule_parser.set_defaults(handler=self.run_schedule)
         schedule_parser.add_argument("--config", type=str, default="", help="Path to reproq config file")
         schedule_parser.add_argument("--interval", type=str, default="30s")
         schedule_parser.add_argument("--database", type=str, default="", help="Django database alias for beat DSN")
+        schedule_parser.add_argument("--no-exec", action="store_true", help="Run beat as a child process instead of replacing this process")
 
         # PG Cron
         pgcron_parser = subparsers.add_parser(
             "pg-cron",
             help="Configure Postgres-native periodic scheduling via pg_cron",
         )
+        pgcron_parser.set_defaults(handler=self.run_pg_cron)
         pgcron_parser.add_argument(
             "--install",
             action="store_true",
@@ -97,19 +264,34 @@ class Command(BaseCommand):
         pgcron_parser.add_argument("--database", type=str, default="", help="Django database alias for pg_cron")
 
         # Migrate
-        subparsers.add_parser("migrate-worker", help="Apply Go worker SQL optimizations")
+        migrate_parser = subparsers.add_parser("migrate-worker", help="Apply Go worker SQL optimizations")
+        migrate_parser.set_defaults(handler=self.run_migrate)
+        migrate_parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-apply worker SQL even if the recorded schema version is current",
+        )
 
         # Check
-        subparsers.add_parser("check", help="Verify configuration")
+        subparsers.add_parser("check", help="Verify configuration").set_defaults(
+            handler=self.run_check
+        )
 
         # Install
         install_parser = subparsers.add_parser("install", help="Download or build the Go worker binary")
+        install_parser.set_defaults(handler=self.run_install)
         install_parser.add_argument("--source", type=str, help="Path to reproq-worker source")
         install_parser.add_argument("--build", action="store_true", help="Force building from source")
         install_parser.add_argument("--tag", type=str, default="latest", help="GitHub release tag")
+        install_parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always download instead of reusing ~/.cache/reproq",
+        )
 
         # Init
         init_parser = subparsers.add_parser("init", help="Bootstrap Reproq in the current project")
+        init_parser.set_defaults(handler=self.run_init)
         init_parser.add_argument("--config", type=str, default="", help="Path to config file to write")
         init_parser.add_argument("--format", choices=["yaml", "toml"], default="yaml", help="Config format")
         init_parser.add_argument("--force", action="store_true", help="Overwrite existing config file")
@@ -122,25 +304,36 @@ class Command(BaseCommand):
 
         # Stats
         stats_parser = subparsers.add_parser("stats", help="Show task execution statistics")
+        stats_parser.set_defaults(handler=self.run_stats)
         stats_parser.add_argument("--database", type=str, default="", help="Django database alias")
         stats_parser.add_argument("--all-databases", action="store_true", help="Aggregate across configured databases")
         status_parser = subparsers.add_parser("status", help="Show task execution statistics (alias)")
+        status_parser.set_defaults(handler=self.run_stats)
         status_parser.add_argument("--database", type=str, default="", help="Django database alias")
         status_parser.add_argument("--all-databases", action="store_true", help="Aggregate across configured databases")
 
         # Stress Test
         stress_parser = subparsers.add_parser("stress-test", help="Enqueue a large number of tasks for benchmarking")
+        stress_parser.set_defaults(handler=self.run_stress_test)
         stress_parser.add_argument("--count", type=int, default=100, help="Number of tasks to enqueue")
         stress_parser.add_argument("--sleep", type=float, default=0, help="Time each task should sleep")
         stress_parser.add_argument("--bulk", action="store_true", help="Use bulk_enqueue")
+        stress_parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads used for per-task enqueue (ignored with --bulk)",
+        )
 
         # Doctor
         doctor_parser = subparsers.add_parser("doctor", help="Validate configuration, schema, and worker binary")
+        doctor_parser.set_defaults(handler=self.run_doctor)
         doctor_parser.add_argument("--config", type=str, default="", help="Path to reproq config file")
         doctor_parser.add_argument("--strict", action="store_true", help="Exit with error on warnings")
 
         # Config
         config_parser = subparsers.add_parser("config", help="Show effective worker/beat configuration")
+        config_parser.set_defaults(handler=self.run_config)
         config_parser.add_argument("--config", type=str, default="", help="Path to reproq config file")
         config_parser.add_argument("--mode", choices=["worker", "beat", "all"], default="worker")
         config_parser.add_argument("--explain", action="store_true", help="Explain config precedence")
@@ -151,6 +344,7 @@ class Command(BaseCommand):
             "allowlist",
             help="Compute ALLOWED_TASK_MODULES from installed task modules",
         )
+        allowlist_parser.set_defaults(handler=self.run_allowlist)
         allowlist_parser.add_argument(
             "--format",
             choices=["env", "plain"],
@@ -179,6 +373,7 @@ class Command(BaseCommand):
             "sync-recurring",
             help="Sync @recurring schedules into PeriodicTask rows",
         )
+        sync_parser.set_defaults(handler=self.run_sync_recurring)
         sync_parser.add_argument("--database", type=str, default="", help="Django database alias")
         sync_parser.add_argument(
             "--clear-missing",
@@ -188,16 +383,19 @@ class Command(BaseCommand):
 
         # Queue controls
         pause_parser = subparsers.add_parser("pause-queue", help="Pause a queue")
+        pause_parser.set_defaults(handler=self.run_pause_queue)
         pause_parser.add_argument("queue", type=str, help="Queue name to pause")
         pause_parser.add_argument("--reason", type=str, default="", help="Optional pause reason")
         pause_parser.add_argument("--database", type=str, default="", help="Django database alias")
 
         resume_parser = subparsers.add_parser("resume-queue", help="Resume a queue")
+        resume_parser.set_defaults(handler=self.run_resume_queue)
         resume_parser.add_argument("queue", type=str, help="Queue name to resume")
         resume_parser.add_argument("--database", type=str, default="", help="Django database alias")
 
         # Logs
         logs_parser = subparsers.add_parser("logs", help="Show task logs from logs_uri")
+        logs_parser.set_defaults(handler=self.run_logs)
         logs_parser.add_argument("--id", type=str, required=True, help="Task result_id (optionally alias:ID)")
         logs_parser.add_argument("--tail", type=int, default=200, help="Tail N lines from the log file")
         logs_parser.add_argument("--max-bytes", type=int, default=1_000_000, help="Max bytes to read")
@@ -206,11 +404,13 @@ class Command(BaseCommand):
 
         # Cancel
         cancel_parser = subparsers.add_parser("cancel", help="Request cancellation for a task run")
+        cancel_parser.set_defaults(handler=self.run_cancel)
         cancel_parser.add_argument("--id", type=str, required=True, help="Task result_id (optionally alias:ID)")
         cancel_parser.add_argument("--database", type=str, default="", help="Django database alias")
 
         # Upgrade
         upgrade_parser = subparsers.add_parser("upgrade", help="Upgrade the Go worker binary")
+        upgrade_parser.set_defaults(handler=self.run_upgrade)
         upgrade_parser.add_argument("--source", type=str, help="Path to reproq-worker source")
         upgrade_parser.add_argument("--build", action="store_true", help="Force building from source")
         upgrade_parser.add_argument("--tag", type=str, default="latest", help="GitHub release tag")
@@ -218,6 +418,7 @@ class Command(BaseCommand):
 
         # systemd
         systemd_parser = subparsers.add_parser("systemd", help="Generate systemd service files")
+        systemd_parser.set_defaults(handler=self.run_systemd)
         systemd_parser.add_argument("--user", type=str, help="User to run as")
         systemd_parser.add_argument("--group", type=str, help="Group to run as")
         systemd_parser.add_argument("--concurrency", type=int, default=10)
@@ -253,6 +454,7 @@ class Command(BaseCommand):
             "reclaim",
             help="Reclaim or fail tasks with expired leases",
         )
+        reclaim_parser.set_defaults(handler=self.run_reclaim)
         reclaim_parser.add_argument(
             "--action",
             choices=["requeue", "fail"],
@@ -287,6 +489,7 @@ class Command(BaseCommand):
             "prune-workers",
             help="Delete workers not seen recently",
         )
+        prune_workers.set_defaults(handler=self.run_prune_workers)
         prune_workers.add_argument(
             "--older-than",
             default="10m",
@@ -304,6 +507,7 @@ class Command(BaseCommand):
             "prune-successful",
             help="Delete successful task runs older than a cutoff",
         )
+        prune_successful.set_defaults(handler=self.run_prune_successful)
         prune_successful.add_argument(
             "--older-than",
             default="7d",
@@ -323,10 +527,52 @@ class Command(BaseCommand):
         prune_successful.add_argument("--database", type=str, default="", help="Django database alias")
         prune_successful.add_argument("--all-databases", action="store_true", help="Prune across configured databases")
 
+        prune_loop = subparsers.add_parser(
+            "prune-loop",
+            help="Run reclaim, prune-workers and prune-successful on an interval",
+        )
+        prune_loop.set_defaults(handler=self.run_prune_loop)
+        prune_loop.add_argument(
+            "--interval",
+            default="1m",
+            help="Time between passes (e.g., 30s, 1m, 5m)",
+        )
+        prune_loop.add_argument(
+            "--reclaim-action",
+            choices=["requeue", "fail"],
+            default="requeue",
+            help="What to do with expired leases",
+        )
+        prune_loop.add_argument(
+            "--reclaim-older-than",
+            default="0s",
+            help="Only reclaim leases expired longer than this",
+        )
+        prune_loop.add_argument(
+            "--workers-older-than",
+            default="10m",
+            help="Delete workers not seen for this long",
+        )
+        prune_loop.add_argument(
+            "--successful-older-than",
+            default="7d",
+            help="Delete successful tasks older than this",
+        )
+        prune_loop.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Per-pass cap for reclaim and prune-successful (0 = no limit)",
+        )
+        prune_loop.add_argument("--once", action="store_true", help="Run a single pass and exit")
+        prune_loop.add_argument("--database", type=str, default="", help="Django database alias")
+        prune_loop.add_argument("--all-databases", action="store_true", help="Run across configured databases")
+
         prune_parser = subparsers.add_parser(
             "prune",
             help="Delete task runs by status and age",
         )
+        prune_parser.set_defaults(handler=self.run_prune)
         prune_parser.add_argument(
             "--statuses",
             type=str,
@@ -360,59 +606,14 @@ class Command(BaseCommand):
         prune_parser.add_argument("--all-databases", action="store_true", help="Prune across configured databases")
 
     def handle(self, *args, **options):
-        subcommand = options["subcommand"]
-        
-        if subcommand == "check":
-            self.run_check()
-        elif subcommand == "init":
-            self.run_init(options)
-        elif subcommand == "doctor":
-            self.run_doctor(options)
-        elif subcommand == "config":
-            self.run_config(options)
-        elif subcommand == "upgrade":
-            self.run_upgrade(options)
-        elif subcommand == "stats":
-            self.run_stats(options)
-        elif subcommand == "status":
-            self.run_stats(options)
-        elif subcommand == "stress-test":
-            self.run_stress_test(options)
-        elif subcommand == "systemd":
-            self.run_systemd(options)
-        elif subcommand == "install":
-            self.run_install(options)
-        elif subcommand == "migrate-worker":
-            self.run_migrate(options)
-        elif subcommand == "allowlist":
-            self.run_allowlist(options)
-        elif subcommand == "sync-recurring":
-            self.run_sync_recurring(options)
-        elif subcommand == "pause-queue":
-            self.run_pause_queue(options)
-        elif subcommand == "resume-queue":
-            self.run_resume_queue(options)
-        elif subcommand == "logs":
-            self.run_logs(options)
-        elif subcommand == "cancel":
-            self.run_cancel(options)
-        elif subcommand == "reclaim":
-            self.run_reclaim(options)
-        elif subcommand == "prune-workers":
-            self.run_prune_workers(options)
-        elif subcommand == "prune-successful":
-            self.run_prune_successful(options)
-        elif subcommand == "prune":
-            self.run_prune(options)
-        elif subcommand == "pg-cron":
-            self.run_pg_cron(options)
-        elif subcommand == "schedule":
-            options["once"] = True
-            self.run_worker_or_beat("beat", options)
-        elif subcommand in ["worker", "beat"]:
-            self.run_worker_or_beat(subcommand, options)
-
-    def run_check(self):
+        # Each subparser registers its run_* method via set_defaults(handler=...).
+        options["handler"](options)
+
+    def run_schedule(self, options):
+        options["once"] = True
+        self.run_worker_or_beat("beat", options)
+
+    def run_check(self, options=None):
         self.stdout.write("Checking Reproq configuration...")
         failed = False
         low_memory = os.getenv("LOW_MEMORY_MODE", "").strip().lower() in {
@@ -429,8 +630,19 @@ class Command(BaseCommand):
         db_alias = default_db_alias()
         worker_bin, resolved_bin, exists = self._resolve_worker_bin()
         self.stdout.write(f"Resolved worker binary: {resolved_bin or worker_bin}")
+        from concurrent.futures import ThreadPoolExecutor
+
+        connect_error = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            probe = executor.submit(self._worker_version, worker_bin, resolved_bin)
+            # Connect while the binary starts up; a failure is re-raised where
+            # the schema check below would have hit it.
+            try:
+                connections[db_alias].ensure_connection()
+            except Exception as e:
+                connect_error = e
         try:
-            version = subprocess.check_output([worker_bin, "--version"]).decode().strip()
+            version = probe.result()
             self.stdout.write(self.style.SUCCESS(f"✅ Worker binary: {version}"))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"❌ Worker binary invalid: {e}"))
@@ -454,9 +666,10 @@ class Command(BaseCommand):
         conn = connections[db_alias]
         if db_alias != "default":
             self.stdout.write(f"Database alias: {db_alias}")
+        if connect_error is not None:
+            raise connect_error
         with conn.cursor() as cursor:
-            tables = conn.introspection.table_names(cursor)
-            if "task_runs" in tables:
+            if self._existing_tables(conn, cursor, ("task_runs",)):
                 self.stdout.write(self.style.SUCCESS("✅ Database schema present."))
             else:
                 self.stderr.write(self.style.ERROR("❌ Database schema missing (run migrate)."))
@@ -582,20 +795,23 @@ class Command(BaseCommand):
         for error in env_errors:
             fail(error)
 
-        effective, sources = self._effective_config(file_config, env_config)
+        effective, sources = self._effective_config(
+            file_config, env_config, track_sources=False
+        )
         if not config_path:
             settings_dsn = self.get_dsn()
             if settings_dsn and not effective.get("dsn"):
                 self._apply_settings_dsn(effective, sources, settings_dsn, "settings")
 
-        worker_dsn = self._resolve_effective_dsn(effective, "worker")
+        effective_dsns = self._build_effective_dsns(effective)
+        worker_dsn = effective_dsns["worker"]
         if worker_dsn:
             self.stdout.write(self.style.SUCCESS("✅ Worker DSN configured."))
             self.stdout.write(f"Worker DSN: {self._mask_dsn(worker_dsn)}")
         else:
             fail("Worker DSN missing (use DATABASE_URL, settings, or config file).")
 
-        beat_dsn = self._resolve_effective_dsn(effective, "beat")
+        beat_dsn = effective_dsns["beat"]
         if beat_dsn:
             self.stdout.write(self.style.SUCCESS("✅ Beat DSN configured."))
         else:
@@ -609,7 +825,7 @@ class Command(BaseCommand):
             )
         else:
             try:
-                version = subprocess.check_output([worker_bin, "--version"]).decode().strip()
+                version = self._worker_version(worker_bin, resolved_bin)
                 self.stdout.write(self.style.SUCCESS(f"✅ Worker binary: {version}"))
             except Exception as exc:
                 fail(f"Worker binary failed version check: {exc}")
@@ -623,16 +839,8 @@ class Command(BaseCommand):
             fail(f"Database connection failed: {exc}")
         else:
             with connection.cursor() as cursor:
-                tables = set(connection.introspection.table_names(cursor))
-            required_tables = {
-                "task_runs",
-                "periodic_tasks",
-                "reproq_workers",
-                "rate_limits",
-                "workflow_runs",
-                "reproq_queue_controls",
-            }
-            missing = sorted(required_tables - tables)
+                tables = self._existing_tables(connection, cursor, _REQUIRED_TABLES)
+            missing = sorted(set(_REQUIRED_TABLES) - tables)
             if missing:
                 fail(
                     "Reproq schema missing tables: "
@@ -641,7 +849,7 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(self.style.SUCCESS("✅ Reproq schema present."))
 
-        allowlist = effective.get("worker", {}).get("allowed_task_modules", [])
+        allowlist = effective.get("worker", _EMPTY_MAP).get("allowed_task_modules", [])
         if not allowlist:
             auto_allowed, _, allow_errors = self._compute_allowed_task_modules()
             if allow_errors:
@@ -656,7 +864,7 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS("✅ ALLOWED_TASK_MODULES configured."))
 
-        logs_dir = effective.get("worker", {}).get("logs_dir", "")
+        logs_dir = effective.get("worker", _EMPTY_MAP).get("logs_dir", "")
         if logs_dir and not os.path.isdir(logs_dir):
             warn(f"Logs directory does not exist yet: {logs_dir}")
 
@@ -680,7 +888,9 @@ class Command(BaseCommand):
         if env_errors:
             raise CommandError("; ".join(env_errors))
 
-        effective, sources = self._effective_config(file_config, env_config)
+        effective, sources = self._effective_config(
+            file_config, env_config, track_sources=bool(options.get("explain"))
+        )
         if not config_path:
             settings_dsn = self.get_dsn()
             if settings_dsn and not effective.get("dsn"):
@@ -688,7 +898,7 @@ class Command(BaseCommand):
 
         mode = options.get("mode", "worker")
         view = self._select_config_view(effective, mode)
-        masked = self._mask_config(view)
+        masked = self._mask_config_fast(view)
 
         if config_path:
             self.stdout.write(f"Config file: {config_path} ({config_format})")
@@ -718,64 +928,75 @@ class Command(BaseCommand):
             "REPROQ_WORKER_BIN"
         )
 
-        system = platform.system().lower()
-        arch = platform.machine().lower()
-        if arch == "x86_64":
-            arch = "amd64"
-        if arch == "arm64" or arch == "aarch64":
-            arch = "arm64"
-
-        ext = ".exe" if system == "windows" else ""
-        bin_name = f"reproq-{system}-{arch}{ext}"
         if override_path:
             target_path = os.path.abspath(os.path.expanduser(str(override_path)))
             bin_dir = os.path.dirname(target_path)
         else:
             bin_dir = os.path.join(os.getcwd(), ".reproq", "bin")
-            target_path = os.path.join(bin_dir, f"reproq{ext}")
+            target_path = os.path.join(bin_dir, f"reproq{_EXE_SUFFIX}")
         os.makedirs(bin_dir, exist_ok=True)
         if override_path:
             self.stdout.write(f"Override path: {override_path}")
-        self.stdout.write(f"Platform: {system}/{arch}")
+        self.stdout.write(f"Platform: {_SYSTEM}/{_ARCH}")
         self.stdout.write(f"Target path: {target_path}")
 
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_path = tmp_file.name
+        # Stage next to the target so the final rename is atomic and never
+        # copies the binary across filesystems. A unique name keeps concurrent
+        # installs into the same bin_dir from writing over each other.
+        fd, tmp_path = tempfile.mkstemp(dir=bin_dir, prefix=".reproq-dl-")
+        os.close(fd)
 
         success = False
+        # True once the download matched the published release checksum.
+        verified = False
         if not options.get("build"):
             tag = options.get("tag", "latest")
-            url = f"https://github.com/adpena/reproq-worker/releases/download/{tag}/{bin_name}"
+            url = f"https://github.com/adpena/reproq-worker/releases/download/{tag}/{_BIN_NAME}"
             if tag == "latest":
-                url = f"https://github.com/adpena/reproq-worker/releases/latest/download/{bin_name}"
-
-            self.stdout.write(f"Downloading pre-built binary: {url}")
-            try:
-                with urllib.request.urlopen(url) as response:
-                    with open(tmp_path, 'wb') as f:
-                        shutil.copyfileobj(response, f)
-                checksum = self._download_checksum(url)
-                if checksum:
-                    actual = self._sha256_file(tmp_path)
-                    if actual != checksum:
-                        raise CommandError("Downloaded binary checksum mismatch.")
-                    self.stdout.write(self.style.SUCCESS("✅ Checksum verified."))
+                url = f"https://github.com/adpena/reproq-worker/releases/latest/download/{_BIN_NAME}"
+
+            cached_path = None
+            cached_etag = None
+            if not options.get("no_cache"):
+                cached_path = os.path.join(self._binary_cache_dir(tag), _BIN_NAME)
+                if tag != "latest":
+                    if self._load_cached_binary(cached_path, tmp_path):
+                        self.stdout.write(f"Using cached binary: {cached_path}")
+                        success = True
                 else:
-                    self.stdout.write(self.style.WARNING("Checksum not found; skipping verification."))
-                success = True
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f"Download failed: {e}"))
+                    # "latest" moves; revalidate the cached copy with a
+                    # conditional GET instead of trusting it outright.
+                    cached_etag = self._read_cached_etag(cached_path)
+
+            if not success:
+                self.stdout.write(f"Downloading pre-built binary: {url}")
+                try:
+                    fetched = self._download_binary(url, tmp_path, if_none_match=cached_etag)
+                    if fetched is None:
+                        if self._load_cached_binary(cached_path, tmp_path):
+                            self.stdout.write(f"Release unchanged; using cached binary: {cached_path}")
+                            success = True
+                        else:
+                            fetched = self._download_binary(url, tmp_path)
+                    if fetched is not None:
+                        sha256, etag = fetched
+                        checksum = self._download_checksum(url)
+                        if checksum:
+                            if sha256 != checksum:
+                                raise CommandError("Downloaded binary checksum mismatch.")
+                            self.stdout.write(self.style.SUCCESS("✅ Checksum verified."))
+                            verified = True
+                        else:
+                            self.stdout.write(self.style.WARNING("Checksum not found; skipping verification."))
+                        success = True
+                        if cached_path:
+                            self._store_cached_binary(cached_path, tmp_path, sha256, etag)
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Download failed: {e}"))
 
         if not success:
-            source_path = options.get("source") or os.path.join(
-                os.path.dirname(
-                    os.path.dirname(
-                        os.path.dirname(
-                            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                        )
-                    )
-                ),
-                "reproq-worker",
+            source_path = options.get("source") or str(
+                Path(os.path.abspath(__file__)).parents[4] / "reproq-worker"
             )
             if os.path.exists(source_path):
                 self.stdout.write(f"Building from local source: {source_path}...")
@@ -789,13 +1010,25 @@ class Command(BaseCommand):
 
         if not success:
             self.stderr.write(self.style.ERROR("Failed to install worker."))
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
             sys.exit(1)
 
-        if system != "windows":
+        if _SYSTEM != "windows":
             os.chmod(tmp_path, 0o755)
         try:
-            subprocess.check_output([tmp_path, "--version"])
-            shutil.move(tmp_path, target_path)
+            if not verified:
+                # Nothing vouches for local builds, cache hits or releases
+                # without a checksum, so make sure the binary runs here.
+                # Only the exit status matters; don't set up a pipe for output.
+                subprocess.run(
+                    [tmp_path, "--version"],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                    timeout=_VERSION_PROBE_TIMEOUT,
+                )
+            os.replace(tmp_path, target_path)
             self.stdout.write(self.style.SUCCESS(f"Successfully installed to {target_path}"))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Verification failed: {e}"))
@@ -851,18 +1084,16 @@ class Command(BaseCommand):
             )
             return f"/bin/bash -lc '{guarded}'"
 
+        worker_cmd = shlex.join(worker_args)
+        beat_cmd = shlex.join(beat_args)
         services = {
             "worker": {
-                "cmd": " ".join(shlex.quote(str(arg)) for arg in worker_args),
+                "cmd": worker_cmd,
                 "type": "simple",
                 "restart": True,
             },
             "beat": {
-                "cmd": wrap_scheduler_guard(
-                    " ".join(shlex.quote(str(arg)) for arg in beat_args),
-                    "beat",
-                    "beat",
-                ),
+                "cmd": wrap_scheduler_guard(beat_cmd, "beat", "beat"),
                 "type": "simple",
                 "restart": True,
             },
@@ -880,90 +1111,73 @@ class Command(BaseCommand):
         if env_lines:
             env_block = "\n".join(env_lines) + "\n"
 
+        unit_fields = {
+            "project": project_name,
+            "user": user,
+            "group": group,
+            "cwd": cwd,
+            "env_block": env_block,
+        }
         for name, service in services.items():
-            cmd = service["cmd"]
-            service_type = service["type"]
             restart_line = "Restart=always\nRestartSec=5\n" if service["restart"] else ""
-            content = f"""[Unit]
-Description=Reproq {name.capitalize()} - {project_name}
-After=network.target postgresql.service
-
-[Service]
-Type={service_type}
-User={user}
-Group={group}
-WorkingDirectory={cwd}
-{env_block}ExecStart={cmd}
-{restart_line}
-
-[Install]
-WantedBy=multi-user.target
-"""
+            content = _SYSTEMD_SERVICE_TEMPLATE.substitute(
+                unit_fields,
+                title=name.capitalize(),
+                service_type=service["type"],
+                cmd=service["cmd"],
+                service_tail=restart_line + "\n",
+            )
             service_name = f"reproq-{name}-{project_name}.service"
-            with open(service_name, "w") as f:
-                f.write(content)
+            self._write_unit_file(service_name, content)
             self.stdout.write(f"Generated {service_name}")
 
         if options.get("schedule"):
-            schedule_cmd = wrap_scheduler_guard(
-                " ".join(shlex.quote(str(arg)) for arg in schedule_args),
-                "cron",
-                None,
+            schedule_cmd = wrap_scheduler_guard(shlex.join(schedule_args), "cron", None)
+            schedule_service = _SYSTEMD_SERVICE_TEMPLATE.substitute(
+                unit_fields,
+                title="Schedule",
+                service_type="oneshot",
+                cmd=schedule_cmd,
+                service_tail="",
             )
-            schedule_service = f"""[Unit]
-Description=Reproq Schedule - {project_name}
-After=network.target postgresql.service
-
-[Service]
-Type=oneshot
-User={user}
-Group={group}
-WorkingDirectory={cwd}
-{env_block}ExecStart={schedule_cmd}
-
-[Install]
-WantedBy=multi-user.target
-"""
             schedule_service_name = f"reproq-schedule-{project_name}.service"
-            with open(schedule_service_name, "w") as f:
-                f.write(schedule_service)
+            self._write_unit_file(schedule_service_name, schedule_service)
             self.stdout.write(f"Generated {schedule_service_name}")
 
             schedule_on_calendar = options.get("schedule_on_calendar") or "*-*-* *:*:00"
-            schedule_timer = f"""[Unit]
-Description=Reproq Schedule Timer - {project_name}
-
-[Timer]
-OnCalendar={schedule_on_calendar}
-Persistent=true
-
-[Install]
-WantedBy=timers.target
-"""
+            schedule_timer = _SYSTEMD_TIMER_TEMPLATE.substitute(
+                title="Schedule",
+                project=project_name,
+                on_calendar=schedule_on_calendar,
+            )
             schedule_timer_name = f"reproq-schedule-{project_name}.timer"
-            with open(schedule_timer_name, "w") as f:
-                f.write(schedule_timer)
+            self._write_unit_file(schedule_timer_name, schedule_timer)
             self.stdout.write(f"Generated {schedule_timer_name}")
 
+    def _write_unit_file(self, path, content):
+        # Write to a sibling temp file and rename so an interrupted run never
+        # leaves a truncated unit behind.
+        tmp_path = f"{path}.tmp"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+        fd = os.open(tmp_path, flags, 0o644)
+        try:
+            data = memoryview(content.encode("utf-8"))
+            while data:
+                data = data[os.write(fd, data):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+
     def _parse_duration(self, value: str) -> timedelta:
         if not value:
             return timedelta(0)
-        match = re.match(r"^\s*(\d+)\s*([smhd])\s*$", value)
+        match = _DURATION_RE.match(value)
         if not match:
             raise CommandError(
                 "Invalid duration. Use formats like 30s, 5m, 2h, 1d."
             )
-        count = int(match.group(1))
-        unit = match.group(2)
-        if unit == "s":
-            return timedelta(seconds=count)
-        if unit == "m":
-            return timedelta(minutes=count)
-        if unit == "h":
-            return timedelta(hours=count)
-        if unit == "d":
-            return timedelta(days=count)
-        raise CommandError("Invalid duration unit.")
+        return timedelta(**{_DURATION_UNITS[match.group(2)]: int(match.group(1))})
 
     def _resolve_db_alias(self, options, result_id: str | None = None) -> str:
         alias = (options or {}).get("database") or ""
@@ -996,105 +1210,212 @@ WantedBy=timers.target
                 cancel_requested=False,
             ).filter(lease_filter)
 
-            if options["limit"] and options["limit"] > 0:
-                ids = list(
-                    queryset.order_by("leased_until", "result_id")
-                    .values_list("result_id", flat=True)[: options["limit"]]
-                )
-                queryset = TaskRun.objects.using(alias).filter(result_id__in=ids)
+            limit = options["limit"] or 0
+            if limit > 0 or not options["dry_run"]:
+                # Keep the limit server-side; SKIP LOCKED lets reclaim step
+                # around rows a worker is touching and lets concurrent reclaim
+                # runs pick disjoint batches instead of blocking.
+                candidates = queryset.values("result_id")
+                if not options["dry_run"]:
+                    candidates = candidates.select_for_update(skip_locked=True)
+                if limit > 0:
+                    candidates = candidates.order_by("leased_until", "result_id")[:limit]
+                queryset = TaskRun.objects.using(alias).filter(result_id__in=Subquery(candidates))
+
+            with transaction.atomic(using=alias):
+                count = queryset.count()
+                prefix = f"[{alias}] " if len(aliases) > 1 else ""
+                if options["dry_run"]:
+                    self.stdout.write(
+                        self.style.WARNING(f"{prefix}Dry run: {count} task(s) match reclaim criteria.")
+                    )
+                    continue
 
-            count = queryset.count()
-            prefix = f"[{alias}] " if len(aliases) > 1 else ""
-            if options["dry_run"]:
-                self.stdout.write(
-                    self.style.WARNING(f"{prefix}Dry run: {count} task(s) match reclaim criteria.")
-                )
-                continue
+                if count == 0:
+                    self.stdout.write(self.style.SUCCESS(f"{prefix}No expired leases found."))
+                    continue
 
-            if count == 0:
-                self.stdout.write(self.style.SUCCESS(f"{prefix}No expired leases found."))
-                continue
+                action = options["action"]
+                if action == "requeue":
+                    updated = queryset.update(
+                        status="READY",
+                        run_after=now,
+                        leased_until=None,
+                        leased_by=None,
+                        started_at=None,
+                        finished_at=None,
+                    )
+                    self.stdout.write(self.style.SUCCESS(f"{prefix}Requeued {updated} task(s)."))
+                    continue
 
-            action = options["action"]
-            if action == "requeue":
-                updated = queryset.update(
-                    status="READY",
-                    run_after=now,
-                    leased_until=None,
-                    leased_by=None,
-                    started_at=None,
-                    finished_at=None,
-                )
-                self.stdout.write(self.style.SUCCESS(f"{prefix}Requeued {updated} task(s)."))
-                continue
+                reclaim_error = {
+                    "at": now.isoformat(),
+                    "kind": "reclaim",
+                    "message": "Lease expired; marking task failed.",
+                }
+                conn = connections[alias]
+                if conn.vendor == "postgresql":
+                    # One UPDATE appending to errors_json server-side instead of a
+                    # read-modify-write round trip per row.
+                    sql, params = self._reclaim_fail_sql(queryset, alias, now, reclaim_error)
+                    with conn.cursor() as cursor:
+                        cursor.execute(sql, params)
+                        failures = cursor.rowcount
+                    self.stdout.write(self.style.SUCCESS(f"{prefix}Marked {failures} task(s) failed."))
+                    continue
 
-            failures = 0
-            for run in queryset:
-                errors = list(run.errors_json or [])
-                errors.append(
-                    {
-                        "at": now.isoformat(),
-                        "kind": "reclaim",
-                        "message": "Lease expired; marking task failed.",
-                    }
-                )
-                run.status = "FAILED"
-                run.finished_at = now
-                run.last_attempted_at = now
-                run.leased_until = None
-                run.leased_by = None
-                run.errors_json = errors
-                run.save(
-                    update_fields=[
-                        "status",
-                        "finished_at",
-                        "last_attempted_at",
-                        "leased_until",
-                        "leased_by",
-                        "errors_json",
-                    ]
-                )
-                failures += 1
+                failures = 0
+                for run in queryset.only("result_id", "errors_json").iterator(chunk_size=1000):
+                    errors = list(run.errors_json or [])
+                    errors.append(reclaim_error)
+                    run.status = "FAILED"
+                    run.finished_at = now
+                    run.last_attempted_at = now
+                    run.leased_until = None
+                    run.leased_by = None
+                    run.errors_json = errors
+                    run.save(
+                        update_fields=[
+                            "status",
+                            "finished_at",
+                            "last_attempted_at",
+                            "leased_until",
+                            "leased_by",
+                            "errors_json",
+                        ]
+                    )
+                    failures += 1
 
-            self.stdout.write(self.style.SUCCESS(f"{prefix}Marked {failures} task(s) failed."))
+                self.stdout.write(self.style.SUCCESS(f"{prefix}Marked {failures} task(s) failed."))
 
     def run_prune_workers(self, options):
-        from reproq_django.models import Worker
         cutoff = timezone.now() - self._parse_duration(options["older_than"])
         aliases = self._resolve_db_aliases(options)
         for alias in aliases:
             queryset = Worker.objects.using(alias).filter(last_seen_at__lt=cutoff)
-            count = queryset.count()
             prefix = f"[{alias}] " if len(aliases) > 1 else ""
             if options["dry_run"]:
+                count = queryset.count()
                 self.stdout.write(self.style.WARNING(f"{prefix}Dry run: {count} worker(s) would be deleted."))
                 continue
-            queryset.delete()
+            # Workers have no relations or signals, so skip the deletion collector.
+            count = queryset._raw_delete(alias)
             self.stdout.write(self.style.SUCCESS(f"{prefix}Deleted {count} stale worker(s)."))
 
     def run_prune_successful(self, options):
-        from reproq_django.models import TaskRun
         cutoff = timezone.now() - self._parse_duration(options["older_than"])
         aliases = self._resolve_db_aliases(options)
         for alias in aliases:
             queryset = TaskRun.objects.using(alias).filter(status="SUCCESSFUL", finished_at__lt=cutoff)
-            if options["limit"] and options["limit"] > 0:
-                ids = list(
-                    queryset.order_by("finished_at", "result_id")
-                    .values_list("result_id", flat=True)[: options["limit"]]
-                )
-                queryset = TaskRun.objects.using(alias).filter(result_id__in=ids)
-            count = queryset.count()
+            limit = options["limit"] if options["limit"] and options["limit"] > 0 else 0
             prefix = f"[{alias}] " if len(aliases) > 1 else ""
             if options["dry_run"]:
+                count = queryset.count()
+                if limit:
+                    count = min(count, limit)
                 self.stdout.write(self.style.WARNING(f"{prefix}Dry run: {count} task(s) would be deleted."))
                 continue
-            queryset.delete()
+            count = self._delete_task_runs(
+                queryset, alias, ("finished_at", "result_id"), limit
+            )
             self.stdout.write(self.style.SUCCESS(f"{prefix}Deleted {count} successful task(s)."))
 
-    def run_prune(self, options):
-        from reproq_django.models import TaskRun
+    def _reclaim_fail_sql(self, queryset, alias, now, reclaim_error):
+        # Compile against the alias being reclaimed: its transaction holds the
+        # SKIP LOCKED subquery and its backend decides the SQL dialect.
+        subquery, params = queryset.values("result_id").query.get_compiler(using=alias).as_sql()
+        sql = f"""
+            UPDATE {TaskRun._meta.db_table}
+            SET status = 'FAILED',
+                finished_at = %s,
+                last_attempted_at = %s,
+                leased_until = NULL,
+                leased_by = NULL,
+                errors_json = COALESCE(errors_json, '[]'::jsonb) || %s::jsonb
+            WHERE result_id IN ({subquery})
+        """
+        return sql, [now, now, json.dumps([reclaim_error]), *params]
+
+    def _delete_task_runs(self, queryset, alias, order_by, limit=0, batch_size=10_000):
+        """Delete matching task runs in primary-key batches.
+
+        Each batch clears ``parent`` on its children (the SET_NULL the ORM
+        collector would otherwise perform) and then issues a raw DELETE, so no
+        model instances are loaded. Returns the number of rows deleted.
+        """
+        deleted = 0
+        while not limit or deleted < limit:
+            size = min(batch_size, limit - deleted) if limit else batch_size
+            ids = list(
+                queryset.order_by(*order_by).values_list("result_id", flat=True)[:size]
+            )
+            if not ids:
+                break
+            with transaction.atomic(using=alias):
+                TaskRun.objects.using(alias).filter(parent_id__in=ids).update(parent=None)
+                removed = TaskRun.objects.using(alias).filter(result_id__in=ids)._raw_delete(
+                    alias
+                )
+            deleted += removed
+            if not removed or len(ids) < size:
+                break
+        return deleted
+
+    def run_prune_loop(self, options):
+        """Repeat the maintenance commands in one process.
+
+        Cron-driven reclaim/prune pay for Django startup and a new database
+        connection every run; looping here reuses both (keep the connection
+        open between passes with CONN_MAX_AGE).
+        """
+        import time
+
+        interval = self._parse_duration(options["interval"]).total_seconds()
+        if interval <= 0 and not options.get("once"):
+            raise CommandError("--interval must be positive.")
+        shared = {
+            "database": options.get("database") or "",
+            "all_databases": options.get("all_databases", False),
+            "dry_run": False,
+        }
+        reclaim_options = {
+            **shared,
+            "action": options["reclaim_action"],
+            "older_than": options["reclaim_older_than"],
+            "limit": options["limit"],
+            "include_null_lease": False,
+        }
+        workers_options = {**shared, "older_than": options["workers_older_than"]}
+        successful_options = {
+            **shared,
+            "older_than": options["successful_older_than"],
+            "limit": options["limit"],
+        }
+        aliases = self._resolve_db_aliases(options)
+        try:
+            while True:
+                try:
+                    self.run_reclaim(reclaim_options)
+                    self.run_prune_workers(workers_options)
+                    self.run_prune_successful(successful_options)
+                except DatabaseError as exc:
+                    if options.get("once"):
+                        raise
+                    # A restart or failover must not end the loop; drop the
+                    # broken connections and try again next pass.
+                    self.stderr.write(self.style.ERROR(f"Prune pass failed: {exc}"))
+                    for alias in aliases:
+                        connections[alias].close()
+                else:
+                    if options.get("once"):
+                        return
+                    for alias in aliases:
+                        connections[alias].close_if_unusable_or_obsolete()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped prune loop.")
 
+    def run_prune(self, options):
         cutoff = timezone.now() - self._parse_duration(options["older_than"])
         statuses = [s.strip().upper() for s in options["statuses"].split(",") if s.strip()]
         field = options.get("field") or "finished_at"
@@ -1103,18 +1424,15 @@ WantedBy=timers.target
         for alias in aliases:
             queryset = TaskRun.objects.using(alias).filter(status__in=statuses)
             queryset = queryset.filter(**{f"{field}__lt": cutoff})
-            if options["limit"] and options["limit"] > 0:
-                ids = list(
-                    queryset.order_by(field, "result_id")
-                    .values_list("result_id", flat=True)[: options["limit"]]
-                )
-                queryset = TaskRun.objects.using(alias).filter(result_id__in=ids)
-            count = queryset.count()
+            limit = options["limit"] if options["limit"] and options["limit"] > 0 else 0
             prefix = f"[{alias}] " if len(aliases) > 1 else ""
             if options["dry_run"]:
+                count = queryset.count()
+                if limit:
+                    count = min(count, limit)
                 self.stdout.write(self.style.WARNING(f"{prefix}Dry run: {count} task(s) would be deleted."))
                 continue
-            queryset.delete()
+            count = self._delete_task_runs(queryset, alias, (field, "result_id"), limit)
             self.stdout.write(self.style.SUCCESS(f"{prefix}Deleted {count} task(s)."))
 
     def run_sync_recurring(self, options):
@@ -1168,6 +1486,19 @@ WantedBy=timers.target
         if conn.vendor != "postgresql":
             return
 
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT 1
+                FROM task_runs
+                WHERE task_path IS NULL
+                  AND NULLIF(spec_json->>'task_path', '') IS NOT NULL
+                LIMIT 1;
+                """
+            )
+            if cursor.fetchone() is None:
+                return
+
         self.stdout.write("Backfilling task_path in batches...")
         while True:
             with conn.cursor() as cursor:
@@ -1196,16 +1527,32 @@ WantedBy=timers.target
         conn = connections[db_alias]
         # Go specific optimizations (e.g. creating extensions)
         self.stdout.write(f"Applying worker-specific optimizations ({db_alias})...")
+        # Share one cursor across the whole run; _backfill_task_path uses its own.
         with conn.cursor() as cursor:
-            try:
-                cursor.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto;")
-                self.stdout.write(self.style.SUCCESS("✅ pgcrypto extension enabled."))
-            except Exception as e:
-                self.stderr.write(self.style.WARNING(f"⚠️ Could not enable pgcrypto: {e}"))
-        with conn.cursor() as cursor:
-            tables = set(conn.introspection.table_names(cursor))
-        required_tables = {"task_runs", "periodic_tasks", "reproq_workers", "rate_limits", "workflow_runs", "reproq_queue_controls"}
-        missing_tables = sorted(required_tables - tables)
+            self._migrate_worker_schema(conn, cursor, db_alias, options)
+
+    def _migrate_worker_schema(self, conn, cursor, db_alias, options):
+        tables = self._existing_tables(conn, cursor, _REQUIRED_TABLES)
+        missing_tables = sorted(set(_REQUIRED_TABLES) - tables)
+        # reproq_schema_meta outlives the tables (migrate ... zero, manual
+        # drops), so the recorded version only counts while they all exist.
+        if (
+            not (options or {}).get("force")
+            and not missing_tables
+            and self._worker_schema_version(conn, cursor) == WORKER_SCHEMA_VERSION
+            and self._spec_unique_index_valid(cursor)
+        ):
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Reproq schema already up to date (version {WORKER_SCHEMA_VERSION})."
+                )
+            )
+            return
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto;")
+            self.stdout.write(self.style.SUCCESS("✅ pgcrypto extension enabled."))
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"⚠️ Could not enable pgcrypto: {e}"))
         ensure_pre_statements = [
             """
             ALTER TABLE task_runs
@@ -1304,13 +1651,11 @@ WantedBy=timers.target
         ]
         if not missing_tables:
             self.stdout.write(self.style.SUCCESS("✅ Reproq schema already present."))
-            with conn.cursor() as cursor:
-                for statement in ensure_pre_statements:
-                    cursor.execute(statement)
+            self._execute_batched(cursor, ensure_pre_statements)
             self._backfill_task_path(db_alias=db_alias)
-            with conn.cursor() as cursor:
-                for statement in ensure_post_statements:
-                    cursor.execute(statement)
+            self._execute_batched(cursor, ensure_post_statements)
+            if self._ensure_spec_unique_index(cursor):
+                self._record_worker_schema_version(cursor)
             self.stdout.write(self.style.SUCCESS("✅ Reproq schema updated."))
             return
         self.stdout.write(
@@ -1365,11 +1710,6 @@ WantedBy=timers.target
             WHERE status = 'READY';
             """,
             """
-            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_task_runs_spec_unique
-            ON task_runs (spec_hash)
-            WHERE status IN ('READY', 'RUNNING');
-            """,
-            """
             CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_runs_lock_key
             ON task_runs (lock_key)
             WHERE status = 'RUNNING';
@@ -1503,17 +1843,143 @@ WantedBy=timers.target
             ON workflow_runs (callback_result_id);
             """,
         ]
-        with conn.cursor() as cursor:
-            for statement in statements:
-                cursor.execute(statement)
-            for statement in ensure_pre_statements:
-                cursor.execute(statement)
+        self._execute_batched(cursor, statements + ensure_pre_statements)
         self._backfill_task_path(db_alias=db_alias)
-        with conn.cursor() as cursor:
-            for statement in ensure_post_statements:
-                cursor.execute(statement)
+        self._execute_batched(cursor, ensure_post_statements)
+        if self._ensure_spec_unique_index(cursor):
+            self._record_worker_schema_version(cursor)
         self.stdout.write(self.style.SUCCESS("✅ Reproq schema applied."))
 
+    def _spec_unique_index_valid(self, cursor):
+        """Return True/False for a valid/invalid spec_hash index, None if absent."""
+        cursor.execute(
+            """
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = 'idx_task_runs_spec_unique'
+              AND pg_table_is_visible(c.oid);
+            """
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _ensure_spec_unique_index(self, cursor):
+        """Build idx_task_runs_spec_unique, replacing an INVALID leftover.
+
+        A failed CREATE INDEX CONCURRENTLY leaves an invalid index behind that
+        IF NOT EXISTS would skip forever and ON CONFLICT cannot use, so it is
+        dropped first. Duplicate active spec_hash rows are reported instead of
+        attempting a build that is bound to fail. Returns True once a valid
+        index exists.
+        """
+        state = self._spec_unique_index_valid(cursor)
+        if state:
+            return True
+        if state is False:
+            cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_task_runs_spec_unique;")
+        cursor.execute(
+            """
+            SELECT spec_hash, COUNT(*)
+            FROM task_runs
+            WHERE status IN ('READY', 'RUNNING')
+            GROUP BY spec_hash
+            HAVING COUNT(*) > 1
+            ORDER BY COUNT(*) DESC
+            LIMIT 5;
+            """
+        )
+        duplicates = cursor.fetchall()
+        if not duplicates:
+            try:
+                cursor.execute(
+                    """
+                    CREATE UNIQUE INDEX CONCURRENTLY idx_task_runs_spec_unique
+                    ON task_runs (spec_hash)
+                    WHERE status IN ('READY', 'RUNNING');
+                    """
+                )
+                return True
+            except DatabaseError as exc:
+                # Duplicates enqueued while the index was building.
+                cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_task_runs_spec_unique;")
+                self.stderr.write(
+                    self.style.ERROR(f"Failed to build idx_task_runs_spec_unique: {exc}")
+                )
+                return False
+        sample = ", ".join(f"{spec_hash} ({count})" for spec_hash, count in duplicates)
+        self.stderr.write(
+            self.style.ERROR(
+                "Cannot build idx_task_runs_spec_unique: task_runs has duplicate "
+                f"READY/RUNNING spec_hash rows, e.g. {sample}. Cancel or finish the "
+                "duplicates, then re-run migrate-worker. pg-cron stays unavailable "
+                "until the index exists."
+            )
+        )
+        return False
+
+    def _execute_batched(self, cursor, statements):
+        """Run DDL statements with as few round-trips as possible.
+
+        Consecutive statements are sent as one multi-statement query. CREATE
+        INDEX CONCURRENTLY cannot run inside the implicit transaction such a
+        query opens, so each of those is sent on its own.
+        """
+        batch = []
+        for statement in statements:
+            if "CONCURRENTLY" in statement:
+                if batch:
+                    cursor.execute("\n".join(batch))
+                    batch = []
+                cursor.execute(statement)
+            else:
+                batch.append(statement)
+        if batch:
+            cursor.execute("\n".join(batch))
+
+    def _existing_tables(self, conn, cursor, names):
+        """Return the subset of ``names`` that exist as tables or views."""
+        if conn.vendor == "postgresql":
+            # Resolve just the names we care about against search_path
+            # instead of listing every relation in the catalog.
+            cursor.execute(
+                "SELECT name FROM unnest(%s::text[]) AS name "
+                "WHERE to_regclass(name) IS NOT NULL",
+                [list(names)],
+            )
+            return {row[0] for row in cursor.fetchall()}
+        return set(conn.introspection.table_names(cursor)).intersection(names)
+
+    def _worker_schema_version(self, conn, cursor):
+        if conn.vendor != "postgresql":
+            return None
+        cursor.execute("SELECT to_regclass('reproq_schema_meta') IS NOT NULL;")
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute("SELECT version FROM reproq_schema_meta LIMIT 1;")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _record_worker_schema_version(self, cursor):
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reproq_schema_meta (
+                singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+                version INTEGER NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+        cursor.execute(
+            """
+            INSERT INTO reproq_schema_meta (version)
+            VALUES (%s)
+            ON CONFLICT (singleton) DO UPDATE
+            SET version = EXCLUDED.version, updated_at = NOW();
+            """,
+            [WORKER_SCHEMA_VERSION],
+        )
+
     def run_worker_or_beat(self, cmd, options):
         db_alias = (options.get("database") or "").strip()
         dsn = self.get_dsn(db_alias or None)
@@ -1526,40 +1992,9 @@ WantedBy=timers.target
             raise CommandError(
                 f"Worker binary not found (resolved: {resolved_bin or worker_bin}). {hint}"
             )
-        if cmd == "worker":
-            explicit_flags = any(
-                self._flag_present(flag)
-                for flag in [
-                    "--config",
-                    "--concurrency",
-                    "--queues",
-                    "--queue",
-                    "--allowed-task-modules",
-                    "--database",
-                    "--logs-dir",
-                    "--payload-mode",
-                    "--metrics-port",
-                    "--metrics-addr",
-                    "--metrics-auth-token",
-                    "--metrics-allow-cidrs",
-                    "--metrics-tls-cert",
-                    "--metrics-tls-key",
-                    "--metrics-tls-client-ca",
-                    "--metrics-auth-limit",
-                    "--metrics-auth-window",
-                    "--metrics-auth-max-entries",
-                ]
-            )
-        else:
-            explicit_flags = any(
-                self._flag_present(flag)
-                for flag in [
-                    "--config",
-                    "--interval",
-                    "--once",
-                    "--database",
-                ]
-            )
+        provided = self._provided_flags()
+        flag_set = WORKER_FLAGS if cmd == "worker" else BEAT_FLAGS
+        explicit_flags = bool(provided & flag_set)
 
         config_path = self._resolve_config_path(options.get("config"), not explicit_flags)
         use_config = bool(config_path)
@@ -1588,40 +2023,13 @@ WantedBy=timers.target
 
         if cmd == "worker":
             if use_config:
-                if self._flag_present("--concurrency"):
-                    args.extend(["--concurrency", str(options["concurrency"])])
-                if self._flag_present("--queues"):
+                if "--queues" in provided:
                     args.extend(["--queues", options.get("queues") or ""])
-                elif self._flag_present("--queue"):
+                elif "--queue" in provided:
                     args.extend(["--queues", options.get("queue", "default")])
-                if self._flag_present("--allowed-task-modules"):
+                if "--allowed-task-modules" in provided:
                     args.extend(["--allowed-task-modules", options.get("allowed_task_modules") or ""])
-                if self._flag_present("--logs-dir"):
-                    args.extend(["--logs-dir", options.get("logs_dir") or ""])
-                if self._flag_present("--payload-mode"):
-                    args.extend(["--payload-mode", options.get("payload_mode") or ""])
-                if self._flag_present("--metrics-port"):
-                    args.extend(["--metrics-port", str(options["metrics_port"])])
-                if self._flag_present("--metrics-addr"):
-                    args.extend(["--metrics-addr", options.get("metrics_addr") or ""])
-                if self._flag_present("--metrics-auth-token"):
-                    args.extend(["--metrics-auth-token", options.get("metrics_auth_token") or ""])
-                if self._flag_present("--metrics-allow-cidrs"):
-                    args.extend(["--metrics-allow-cidrs", options.get("metrics_allow_cidrs") or ""])
-                if self._flag_present("--metrics-auth-limit"):
-                    args.extend(["--metrics-auth-limit", str(options["metrics_auth_limit"])])
-                if self._flag_present("--metrics-auth-window"):
-                    args.extend(["--metrics-auth-window", options.get("metrics_auth_window") or ""])
-                if self._flag_present("--metrics-auth-max-entries"):
-                    args.extend(["--metrics-auth-max-entries", str(options["metrics_auth_max_entries"])])
-                if self._flag_present("--metrics-tls-cert"):
-                    args.extend(["--metrics-tls-cert", options.get("metrics_tls_cert") or ""])
-                if self._flag_present("--metrics-tls-key"):
-                    args.extend(["--metrics-tls-key", options.get("metrics_tls_key") or ""])
-                if self._flag_present("--metrics-tls-client-ca"):
-                    args.extend(["--metrics-tls-client-ca", options.get("metrics_tls_client_ca") or ""])
             else:
-                args.extend(["--concurrency", str(options["concurrency"])])
                 queues = options.get("queues") or ""
                 if queues:
                     args.extend(["--queues", queues])
@@ -1645,33 +2053,17 @@ WantedBy=timers.target
                                 "No task modules discovered; default allow-list will be used."
                             )
                         )
-                if options.get("logs_dir"):
-                    args.extend(["--logs-dir", options["logs_dir"]])
-                if options.get("payload_mode"):
-                    args.extend(["--payload-mode", options["payload_mode"]])
-                if options.get("metrics_port"):
-                    args.extend(["--metrics-port", str(options["metrics_port"])])
-                if options.get("metrics_addr"):
-                    args.extend(["--metrics-addr", options["metrics_addr"]])
-                if options.get("metrics_auth_token"):
-                    args.extend(["--metrics-auth-token", options["metrics_auth_token"]])
-                if options.get("metrics_allow_cidrs"):
-                    args.extend(["--metrics-allow-cidrs", options["metrics_allow_cidrs"]])
-                if options.get("metrics_tls_cert"):
-                    args.extend(["--metrics-tls-cert", options["metrics_tls_cert"]])
-                if options.get("metrics_tls_key"):
-                    args.extend(["--metrics-tls-key", options["metrics_tls_key"]])
-                if options.get("metrics_tls_client_ca"):
-                    args.extend(["--metrics-tls-client-ca", options["metrics_tls_client_ca"]])
-                if options.get("metrics_auth_limit") is not None:
-                    args.extend(["--metrics-auth-limit", str(options["metrics_auth_limit"])])
-                if options.get("metrics_auth_window"):
-                    args.extend(["--metrics-auth-window", options["metrics_auth_window"]])
-                if options.get("metrics_auth_max_entries") is not None:
-                    args.extend(["--metrics-auth-max-entries", str(options["metrics_auth_max_entries"])])
+            for flag, key, unset in self._WORKER_FLAG_MAP:
+                value = options.get(key)
+                if use_config:
+                    if flag not in provided:
+                        continue
+                elif value is None or value == unset:
+                    continue
+                args.extend([flag, "" if value is None else str(value)])
         elif cmd == "beat":
             if use_config:
-                if self._flag_present("--interval"):
+                if "--interval" in provided:
                     args.extend(["--interval", options["interval"]])
                 if options.get("once"):
                     args.append("--once")
@@ -1681,6 +2073,15 @@ WantedBy=timers.target
                     args.append("--once")
             
         self.stdout.write(f"Starting {cmd}...")
+        if os.name == "posix" and not options.get("no_exec"):
+            # Hand the PID over to the Go binary so signals and the exit code
+            # reach it directly instead of going through this interpreter.
+            self.stdout.flush()
+            self.stderr.flush()
+            try:
+                os.execvp(args[0], args)
+            except OSError as e:
+                raise CommandError(f"Error running {cmd}: {e}") from e
         try:
             subprocess.run(args, check=True)
         except KeyboardInterrupt:
@@ -1709,9 +2110,20 @@ WantedBy=timers.target
         dry_run = options.get("dry_run")
 
         with conn.cursor() as cursor:
-            tables = set(conn.introspection.table_names(cursor))
-            if "periodic_tasks" not in tables:
+            if not self._existing_tables(conn, cursor, ("periodic_tasks",)):
                 raise CommandError("Missing periodic_tasks table. Run migrations first.")
+            if install and not self._spec_unique_index_valid(cursor):
+                # The enqueue function's ON CONFLICT needs this index; without a
+                # valid one every scheduled run would error.
+                message = (
+                    "idx_task_runs_spec_unique is missing or invalid. Run "
+                    "`python manage.py reproq migrate-worker` and resolve any "
+                    "duplicates it reports before installing pg-cron."
+                )
+                if if_supported:
+                    self.stdout.write(self.style.WARNING(f"{message} Skipping."))
+                    return
+                raise CommandError(message)
             if not self._pg_cron_available(cursor):
                 if if_supported:
                     self.stdout.write("pg-cron extension not available; skipping.")
@@ -1742,10 +2154,9 @@ WantedBy=timers.target
 
     def _ensure_pg_cron_extensions(self, cursor, dry_run):
         if dry_run:
-            self.stdout.write("dry-run: ensure extensions pgcrypto, pg_cron")
+            self.stdout.write("dry-run: ensure extension pg_cron")
             return
         try:
-            cursor.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto;")
             cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_cron;")
         except Exception as exc:
             raise CommandError(
@@ -1782,7 +2193,7 @@ WantedBy=timers.target
                 args_json JSONB;
                 kwargs_json JSONB;
                 spec JSONB;
-                spec_hash TEXT;
+                spec_digest TEXT;
             BEGIN
                 SELECT * INTO task_row
                 FROM periodic_tasks
@@ -1792,6 +2203,11 @@ WantedBy=timers.target
                     RETURN;
                 END IF;
 
+                -- Another session is already enqueueing this task for this tick.
+                IF NOT pg_try_advisory_xact_lock(hashtext('reproq_periodic'), hashtext(task_name)) THEN
+                    RETURN;
+                END IF;
+
                 payload_json := COALESCE(task_row.payload_json, '{}'::jsonb);
                 args_json := '[]'::jsonb;
                 kwargs_json := '{}'::jsonb;
@@ -1822,7 +2238,7 @@ WantedBy=timers.target
                         'max_attempts', COALESCE(NULLIF(task_row.max_attempts, 0), 3)
                     )
                 );
-                spec_hash := encode(digest(spec::text, 'sha256'), 'hex');
+                spec_digest := encode(sha256(convert_to(spec::text, 'UTF8')), 'hex');
 
                 INSERT INTO task_runs (
                     backend_alias,
@@ -1846,13 +2262,13 @@ WantedBy=timers.target
                     created_at,
                     updated_at
                 )
-                SELECT
+                VALUES (
                     'default',
                     COALESCE(task_row.queue_name, 'default'),
                     COALESCE(task_row.priority, 0),
                     NOW(),
                     spec,
-                    spec_hash,
+                    spec_digest,
                     task_row.task_path,
                     'READY',
                     NOW(),
@@ -1867,12 +2283,8 @@ WantedBy=timers.target
                     FALSE,
                     NOW(),
                     NOW()
-                WHERE NOT EXISTS (
-                    SELECT 1
-                    FROM task_runs
-                    WHERE task_runs.spec_hash = spec_hash
-                      AND status IN ('READY', 'RUNNING')
-                );
+                )
+                ON CONFLICT (spec_hash) WHERE status IN ('READY', 'RUNNING') DO NOTHING;
 
                 UPDATE periodic_tasks
                 SET last_run_at = NOW(),
@@ -1890,34 +2302,38 @@ WantedBy=timers.target
         cursor.execute(sql)
 
     def _unschedule_pg_cron_jobs(self, cursor, prefix, supports_named, dry_run):
-        rows = []
         if supports_named:
+            label_column = "jobname"
+            pattern = prefix + "%"
+        else:
+            label_column = "command"
+            pattern = "SELECT reproq_enqueue_periodic_task(%"
+
+        if dry_run:
             cursor.execute(
-                "SELECT jobid, jobname FROM cron.job WHERE jobname LIKE %s",
-                [prefix + "%"],
+                f"SELECT jobid, {label_column} FROM cron.job WHERE {label_column} LIKE %s",
+                [pattern],
             )
-            rows = cursor.fetchall()
+            removed = 0
+            for jobid, label in cursor:
+                self.stdout.write(f"dry-run: unschedule job {label} ({jobid})")
+                removed += 1
         else:
+            # Unschedule server-side; only the count comes back over the wire.
             cursor.execute(
-                "SELECT jobid, command FROM cron.job WHERE command LIKE %s",
-                ["SELECT reproq_enqueue_periodic_task(%"],
+                f"SELECT COUNT(cron.unschedule(jobid)) FROM cron.job WHERE {label_column} LIKE %s",
+                [pattern],
             )
-            rows = cursor.fetchall()
+            removed = cursor.fetchone()[0]
 
-        if not rows:
+        if not removed:
             self.stdout.write("No existing pg_cron jobs to remove.")
             return
-
-        for jobid, label in rows:
-            if dry_run:
-                self.stdout.write(f"dry-run: unschedule job {label} ({jobid})")
-                continue
-            cursor.execute("SELECT cron.unschedule(%s);", [jobid])
-        self.stdout.write(f"Removed {len(rows)} pg_cron job(s).")
+        self.stdout.write(f"Removed {removed} pg_cron job(s).")
 
     def _schedule_pg_cron_jobs(self, cursor, prefix, supports_named, dry_run):
         tasks = list(
-            PeriodicTask.objects.filter(enabled=True).values(
+            PeriodicTask.objects.filter(enabled=True).order_by("name").values(
                 "name",
                 "cron_expr",
             )
@@ -1926,7 +2342,10 @@ WantedBy=timers.target
             self.stdout.write("No enabled periodic tasks found; nothing to schedule.")
             return
 
+        # cron.schedule() with an existing jobname replaces that job instead of
+        # failing, so sanitized-name collisions must be resolved here.
         used_names = set()
+        jobs = []
         for task in tasks:
             name = task["name"]
             cron_expr = task["cron_expr"]
@@ -1934,11 +2353,10 @@ WantedBy=timers.target
                 self.stdout.write(f"Skipping periodic task with empty cron_expr: {name}")
                 continue
             jobname = self._pg_cron_job_name(prefix, name)
+            attempt = 0
             while jobname in used_names:
-                jobname = self._pg_cron_job_name(
-                    prefix,
-                    f"{name}-{hashlib.sha256(jobname.encode('utf-8')).hexdigest()[:4]}",
-                )
+                attempt += 1
+                jobname = self._pg_cron_job_name(prefix, f"{name}-{attempt}")
             used_names.add(jobname)
             escaped = name.replace("'", "''")
             command = f"SELECT reproq_enqueue_periodic_task('{escaped}');"
@@ -1946,27 +2364,37 @@ WantedBy=timers.target
                 self.stdout.write(
                     f"dry-run: schedule {jobname} {cron_expr} -> {command}"
                 )
-                continue
+            jobs.append((jobname, cron_expr, command))
+
+        if jobs and not dry_run:
+            jobnames, cron_exprs, commands = (list(column) for column in zip(*jobs))
             if supports_named:
                 cursor.execute(
-                    "SELECT cron.schedule(%s, %s, %s);",
-                    [jobname, cron_expr, command],
+                    """
+                    SELECT cron.schedule(j.jobname, j.cron_expr, j.command)
+                    FROM unnest(%s::text[], %s::text[], %s::text[])
+                        AS j(jobname, cron_expr, command);
+                    """,
+                    [jobnames, cron_exprs, commands],
                 )
             else:
                 cursor.execute(
-                    "SELECT cron.schedule(%s, %s);",
-                    [cron_expr, command],
+                    """
+                    SELECT cron.schedule(j.cron_expr, j.command)
+                    FROM unnest(%s::text[], %s::text[]) AS j(cron_expr, command);
+                    """,
+                    [cron_exprs, commands],
                 )
-        self.stdout.write(f"Scheduled {len(tasks)} pg_cron job(s).")
+        self.stdout.write(f"Scheduled {len(jobs)} pg_cron job(s).")
 
     def _pg_cron_job_name(self, prefix, name):
-        cleaned = re.sub(r"[^a-zA-Z0-9_]+", "_", name).strip("_")
+        cleaned = _PG_CRON_SANITIZE_RE.sub("_", name).strip("_")
         if not cleaned:
-            cleaned = hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+            cleaned = hashlib.blake2b(name.encode("utf-8"), digest_size=4).hexdigest()
         base = f"{prefix}_{cleaned}" if prefix else cleaned
         if len(base) <= 63:
             return base
-        suffix = hashlib.sha256(base.encode("utf-8")).hexdigest()[:8]
+        suffix = hashlib.blake2b(base.encode("utf-8"), digest_size=4).hexdigest()
         return f"{base[:54]}_{suffix}"
 
     def run_allowlist(self, options):
@@ -2024,11 +2452,11 @@ WantedBy=timers.target
         if max_bytes <= 0:
             raise CommandError("--max-bytes must be positive.")
 
-        data = self._read_logs_uri(logs_uri, max_bytes)
-        lines = data.splitlines()
         tail = options.get("tail", 0)
         if tail and tail > 0:
-            lines = lines[-tail:]
+            lines = self._read_logs_tail(logs_uri, tail, max_bytes)
+        else:
+            lines = self._read_logs_uri(logs_uri, max_bytes).splitlines()
         if lines:
             self.stdout.write("\n".join(lines))
         else:
@@ -2058,26 +2486,32 @@ WantedBy=timers.target
             )
 
     def run_stats(self, options):
-        from reproq_django.models import TaskRun, Worker
-        from django.db.models import Count
-
         aliases = self._resolve_db_aliases(options)
         self.stdout.write(self.style.MIGRATE_HEADING("📊 Reproq Statistics"))
 
         totals = {}
         for alias in aliases:
-            stats = TaskRun.objects.using(alias).values("status").annotate(count=Count("result_id"))
+            stats = (
+                TaskRun.objects.using(alias)
+                .values_list("status")
+                .annotate(count=Count("result_id"))
+                .order_by()
+            )
             self.stdout.write(f"\nDatabase: {alias}")
             self.stdout.write("Tasks by Status:")
-            for s in stats:
-                totals[s["status"]] = totals.get(s["status"], 0) + s["count"]
-                color = self.style.SUCCESS if s["status"] == "SUCCESSFUL" else (self.style.ERROR if s["status"] == "FAILED" else self.style.WARNING)
-                self.stdout.write(f"  {s['status']:<12}: {color(str(s['count']))}")
+            for status, count in stats:
+                totals[status] = totals.get(status, 0) + count
+                color = self.style.SUCCESS if status == "SUCCESSFUL" else (self.style.ERROR if status == "FAILED" else self.style.WARNING)
+                self.stdout.write(f"  {status:<12}: {color(str(count))}")
 
-            workers = list(Worker.objects.using(alias).all())
+            workers = list(
+                Worker.objects.using(alias).values_list(
+                    "worker_id", "hostname", "queues", "concurrency"
+                )
+            )
             self.stdout.write(f"Active Workers: {len(workers)}")
-            for w in workers:
-                self.stdout.write(f"  - {w.worker_id} ({w.hostname}) | Queues: {w.queues} | Concurrency: {w.concurrency}")
+            for worker_id, hostname, queues, concurrency in workers:
+                self.stdout.write(f"  - {worker_id} ({hostname}) | Queues: {queues} | Concurrency: {concurrency}")
 
         if len(aliases) > 1:
             self.stdout.write("\nAggregate Totals:")
@@ -2088,7 +2522,6 @@ WantedBy=timers.target
     def run_stress_test(self, options):
         from reproq_django.tasks import debug_noop_task
         import time
-        import django.tasks as django_tasks
 
         count = options["count"]
         sleep = options["sleep"]
@@ -2097,29 +2530,8 @@ WantedBy=timers.target
         self.stdout.write(self.style.MIGRATE_HEADING(f"🚀 Enqueueing {count} tasks (sleep={sleep}s, bulk={bulk})..."))
         start = time.time()
 
-        def _resolve_backend():
-            if hasattr(django_tasks, "tasks"):
-                try:
-                    return django_tasks.tasks["default"]
-                except Exception:
-                    pass
-            if hasattr(django_tasks, "get_task_backend"):
-                try:
-                    return django_tasks.get_task_backend("default")
-                except Exception:
-                    pass
-            if hasattr(debug_noop_task, "get_backend"):
-                try:
-                    return debug_noop_task.get_backend()
-                except Exception:
-                    pass
-            backend = getattr(debug_noop_task, "backend", None)
-            if backend and not isinstance(backend, str):
-                return backend
-            return None
-
         if bulk:
-            backend = _resolve_backend()
+            backend = self._resolve_task_backend(debug_noop_task)
             if backend is None:
                 self.stderr.write(
                     self.style.WARNING(
@@ -2128,20 +2540,75 @@ WantedBy=timers.target
                 )
                 bulk = False
             else:
-                tasks_data = [
-                    (debug_noop_task, (), {"sleep_seconds": sleep})
-                    for _ in range(count)
-                ]
-                backend.bulk_enqueue(tasks_data)
+                # Bounded batches keep memory flat and INSERTs at a size Postgres handles well.
+                entry = (debug_noop_task, (), {"sleep_seconds": sleep})
+                batch_size = 5000
+                for offset in range(0, count, batch_size):
+                    backend.bulk_enqueue([entry] * min(batch_size, count - offset))
 
         if not bulk:
-            for _ in range(count):
-                debug_noop_task.enqueue(sleep_seconds=sleep)
+            threads = max(1, options.get("threads") or 1)
+            if threads == 1 or count < 2:
+                for _ in range(count):
+                    debug_noop_task.enqueue(sleep_seconds=sleep)
+            else:
+                self._threaded_enqueue(debug_noop_task, count, threads, sleep_seconds=sleep)
 
         duration = time.time() - start
         self.stdout.write(self.style.SUCCESS(f"✅ Enqueued {count} tasks in {duration:.2f}s ({count/duration:.1f} tasks/sec)"))
         self.stdout.write("Run 'python manage.py reproq worker' to process them.")
 
+    def _threaded_enqueue(self, task, count, threads, **kwargs):
+        """Enqueue ``count`` copies of ``task`` from a pool of threads.
+
+        Each thread takes one slice of ``count`` and keeps its own database
+        connection for the whole slice, closing it once at the end, so
+        round-trips overlap without reconnecting along the way.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def enqueue_slice(size):
+            try:
+                for _ in range(size):
+                    task.enqueue(**kwargs)
+            finally:
+                connections.close_all()
+
+        threads = max(1, min(threads, count))
+        share, extra = divmod(count, threads)
+        slices = [share + (1 if i < extra else 0) for i in range(threads)]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            # list() re-raises the first enqueue error, if any.
+            list(executor.map(enqueue_slice, slices))
+
+    def _resolve_task_backend(self, task):
+        import django.tasks as django_tasks
+
+        backend = None
+        registry = getattr(django_tasks, "tasks", None)
+        get_task_backend = getattr(django_tasks, "get_task_backend", None)
+        get_backend = getattr(task, "get_backend", None)
+        if registry is not None:
+            try:
+                backend = registry["default"]
+            except Exception:
+                pass
+        if backend is None and get_task_backend is not None:
+            try:
+                backend = get_task_backend("default")
+            except Exception:
+                pass
+        if backend is None and get_backend is not None:
+            try:
+                backend = get_backend()
+            except Exception:
+                pass
+        if backend is None:
+            candidate = getattr(task, "backend", None)
+            if candidate and not isinstance(candidate, str):
+                backend = candidate
+        return backend
+
     def get_worker_bin(self):
         worker_bin = getattr(settings, "REPROQ_WORKER_BIN", None) or os.environ.get(
             "REPROQ_WORKER_BIN"
@@ -2149,32 +2616,32 @@ WantedBy=timers.target
         if worker_bin:
             return worker_bin
 
-        ext = ".exe" if platform.system() == "Windows" else ""
-        project_bin = os.path.join(os.getcwd(), ".reproq", "bin", f"reproq{ext}")
+        project_bin = os.path.join(os.getcwd(), ".reproq", "bin", f"reproq{_EXE_SUFFIX}")
         if os.path.exists(project_bin):
             return project_bin
 
-        pkg_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        candidate = os.path.join(pkg_dir, "bin", f"reproq{ext}")
+        candidate = os.path.join(_PKG_DIR, "bin", f"reproq{_EXE_SUFFIX}")
         return candidate if os.path.exists(candidate) else "reproq"
 
     def get_dsn(self, db_alias: str | None = None):
-        env_dsn = os.environ.get("DATABASE_URL")
-        if env_dsn and not db_alias:
+        if not db_alias and (env_dsn := os.environ.get("DATABASE_URL")):
             return env_dsn
-        alias = db_alias or "default"
-        db_conf = settings.DATABASES.get(alias, {})
+        db_conf = settings.DATABASES.get(db_alias or "default") or {}
         user = db_conf.get("USER")
         name = db_conf.get("NAME")
         if not user or not name:
             return None
-        return f"postgres://{user}:{db_conf.get('PASSWORD', '')}@{db_conf.get('HOST', 'localhost')}:{db_conf.get('PORT', '5432')}/{name}"
+        # Django fills unset HOST/PORT with "", so fall back on falsy values.
+        return _DSN_TEMPLATE(
+            user=user,
+            password=db_conf.get("PASSWORD") or "",
+            host=db_conf.get("HOST") or "localhost",
+            port=db_conf.get("PORT") or "5432",
+            name=name,
+        )
 
-    def _flag_present(self, flag):
-        for arg in sys.argv:
-            if arg == flag or arg.startswith(flag + "="):
-                return True
-        return False
+    def _provided_flags(self):
+        return frozenset(arg.split("=", 1)[0] for arg in sys.argv[1:] if arg.startswith("--"))
 
     def _find_default_config(self):
         candidates = [
@@ -2200,6 +2667,16 @@ WantedBy=timers.target
             return self._find_default_config()
         return ""
 
+    def _worker_version(self, worker_bin, resolved_bin=None):
+        try:
+            st = os.stat(resolved_bin or worker_bin)
+        except OSError:
+            # Let the exec itself report what is wrong with the binary.
+            return _run_version_probe(worker_bin)
+        return _cached_version_probe(
+            resolved_bin or worker_bin, (st.st_ino, st.st_mtime_ns, st.st_size)
+        )
+
     def _resolve_worker_bin(self):
         worker_bin = self.get_worker_bin()
         if os.path.isabs(worker_bin):
@@ -2210,10 +2687,6 @@ WantedBy=timers.target
         return worker_bin, resolved, exists
 
     def _mask_dsn(self, dsn):
-        try:
-            from urllib.parse import urlparse
-        except Exception:
-            return "<unavailable>"
         try:
             parsed = urlparse(dsn)
         except Exception:
@@ -2227,14 +2700,80 @@ WantedBy=timers.target
         user_part = f"{user}@" if user else ""
         return f"{parsed.scheme}://{user_part}{host}{port}/{db}"
 
-    def _sha256_file(self, path):
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
-        return h.hexdigest()
+    def _binary_cache_dir(self, tag):
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "reproq", tag)
+
+    def _download_binary(self, url, dest, if_none_match=None):
+        """Stream ``url`` into ``dest``; return ``(sha256, etag)`` or None on 304."""
+        import urllib.error
+        import urllib.request
+
+        request = urllib.request.Request(url)
+        if if_none_match:
+            request.add_header("If-None-Match", if_none_match)
+        try:
+            response = urllib.request.urlopen(request, timeout=60)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        digest = hashlib.sha256()
+        with response, open(dest, "wb") as f:
+            while chunk := response.read(1024 * 1024):
+                digest.update(chunk)
+                f.write(chunk)
+        return digest.hexdigest(), response.headers.get("ETag")
+
+    def _read_cached_etag(self, cached_path):
+        try:
+            with open(f"{cached_path}.etag") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _load_cached_binary(self, cached_path, tmp_path):
+        """Copy a cached binary to ``tmp_path`` if its digest still matches."""
+        try:
+            with open(f"{cached_path}.sha256") as f:
+                expected = f.read().strip()
+            digest = hashlib.sha256()
+            with open(cached_path, "rb") as src, open(tmp_path, "wb") as dst:
+                while chunk := src.read(1024 * 1024):
+                    digest.update(chunk)
+                    dst.write(chunk)
+        except OSError:
+            return False
+        if digest.hexdigest() != expected:
+            # Corrupt or half-written entry: drop it so the download refills it.
+            for suffix in ("", ".sha256", ".etag"):
+                try:
+                    os.unlink(f"{cached_path}{suffix}")
+                except OSError:
+                    pass
+            os.unlink(tmp_path)
+            return False
+        return True
+
+    def _store_cached_binary(self, cached_path, tmp_path, sha256, etag=None):
+        sidecars = {".sha256": sha256}
+        if etag:
+            sidecars[".etag"] = etag
+        try:
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            shutil.copyfile(tmp_path, f"{cached_path}.part")
+            os.replace(f"{cached_path}.part", cached_path)
+            for suffix, value in sidecars.items():
+                with open(f"{cached_path}{suffix}.part", "w") as f:
+                    f.write(value)
+                os.replace(f"{cached_path}{suffix}.part", f"{cached_path}{suffix}")
+        except OSError as e:
+            # The cache is an optimisation; never fail the install over it.
+            self.stdout.write(self.style.WARNING(f"Could not cache binary: {e}"))
 
     def _download_checksum(self, url):
+        import urllib.request
+
         checksum_url = f"{url}.sha256"
         try:
             with urllib.request.urlopen(checksum_url) as response:
@@ -2262,6 +2801,11 @@ WantedBy=timers.target
         import pkgutil
         from django.apps import apps
 
+        try:
+            from django.tasks import Task
+        except Exception:
+            Task = None
+
         task_paths = set()
         errors = []
 
@@ -2275,7 +2819,7 @@ WantedBy=timers.target
                 continue
             module = self._safe_import(module_name, errors)
             if module:
-                self._collect_task_paths(module, task_paths)
+                self._collect_task_paths(module, task_paths, Task)
             if spec.submodule_search_locations:
                 for _, name, _ in pkgutil.walk_packages(
                     spec.submodule_search_locations,
@@ -2283,7 +2827,7 @@ WantedBy=timers.target
                 ):
                     submodule = self._safe_import(name, errors)
                     if submodule:
-                        self._collect_task_paths(submodule, task_paths)
+                        self._collect_task_paths(submodule, task_paths, Task)
 
         return task_paths, errors
 
@@ -2296,19 +2840,14 @@ WantedBy=timers.target
             errors.append(f"Failed to import {module_name}: {exc}")
             return None
 
-    def _collect_task_paths(self, module, task_paths):
+    def _collect_task_paths(self, module, task_paths, task_cls):
         for value in module.__dict__.values():
-            path = self._extract_task_path(value)
+            path = self._extract_task_path(value, task_cls)
             if path:
                 task_paths.add(path)
 
-    def _extract_task_path(self, candidate):
-        try:
-            from django.tasks import Task
-        except Exception:
-            Task = None
-
-        if Task and isinstance(candidate, Task):
+    def _extract_task_path(self, candidate, task_cls):
+        if task_cls and isinstance(candidate, task_cls):
             module_path = getattr(candidate, "module_path", None)
             if isinstance(module_path, str) and module_path:
                 return module_path
@@ -2323,7 +2862,7 @@ WantedBy=timers.target
 
         nested = getattr(candidate, "task", None)
         if nested is not None:
-            return self._extract_task_path(nested)
+            return self._extract_task_path(nested, task_cls)
 
         return None
 
@@ -2356,9 +2895,11 @@ WantedBy=timers.target
         )
         candidates.append(os.path.join(repo_root, filename))
         for candidate in candidates:
-            if os.path.exists(candidate):
+            try:
                 with open(candidate, "r", encoding="utf-8") as handle:
                     return handle.read()
+            except FileNotFoundError:
+                continue
         try:
             resource = importlib.resources.files("reproq_django.resources").joinpath(filename)
             return resource.read_text(encoding="utf-8")
@@ -2434,6 +2975,17 @@ WantedBy=timers.target
             handle.write(payload)
 
     def _toml_dumps(self, data):
+        try:
+            import tomli_w
+        except ImportError:
+            tomli_w = None
+        if tomli_w is not None:
+            try:
+                return tomli_w.dumps(data)
+            except TypeError:
+                # tomli-w rejects None values; the built-in emitter writes "".
+                pass
+
         lines = []
 
         def emit_section(section, prefix):
@@ -2468,8 +3020,7 @@ WantedBy=timers.target
         return json.dumps(str(value))
 
     def _default_config(self):
-        hostname = platform.node() or "worker"
-        worker_id = f"{hostname}-{os.getpid()}"
+        worker_id = f"{_HOSTNAME}-{os.getpid()}"
         return {
             "dsn": "",
             "worker": {
@@ -2513,10 +3064,12 @@ WantedBy=timers.target
             },
         }
 
-    def _effective_config(self, file_config, env_config):
+    def _effective_config(self, file_config, env_config, track_sources=True):
         config = self._default_config()
-        sources = {}
-        self._set_default_sources(config, sources, "default")
+        sources = None
+        if track_sources:
+            sources = {}
+            self._set_default_sources(config, sources, "default")
         if file_config:
             self._merge_config(config, file_config, "config", sources)
         if env_config:
@@ -2551,116 +3104,125 @@ WantedBy=timers.target
                 errors.append(f"Invalid {name}: {value}")
                 return None
 
-        if os.environ.get("DATABASE_URL"):
-            dsn = os.environ["DATABASE_URL"]
+        env = os.environ
+
+        dsn = env.get("DATABASE_URL")
+        if dsn:
             set_path(["dsn"], dsn)
             set_path(["worker", "dsn"], dsn)
             set_path(["beat", "dsn"], dsn)
 
-        if os.environ.get("WORKER_ID"):
-            set_path(["worker", "worker_id"], os.environ["WORKER_ID"])
+        value = env.get("WORKER_ID")
+        if value:
+            set_path(["worker", "worker_id"], value)
 
-        if os.environ.get("QUEUE_NAMES"):
-            set_path(
-                ["worker", "queues"],
-                self._parse_comma_list(os.environ["QUEUE_NAMES"]),
-            )
+        value = env.get("QUEUE_NAMES")
+        if value:
+            set_path(["worker", "queues"], self._parse_comma_list(value))
 
-        if os.environ.get("ALLOWED_TASK_MODULES"):
-            set_path(
-                ["worker", "allowed_task_modules"],
-                self._parse_comma_list(os.environ["ALLOWED_TASK_MODULES"]),
-            )
+        value = env.get("ALLOWED_TASK_MODULES")
+        if value:
+            set_path(["worker", "allowed_task_modules"], self._parse_comma_list(value))
 
-        if os.environ.get("REPROQ_LOGS_DIR"):
-            set_path(["worker", "logs_dir"], os.environ["REPROQ_LOGS_DIR"])
+        value = env.get("REPROQ_LOGS_DIR")
+        if value:
+            set_path(["worker", "logs_dir"], value)
 
-        if os.environ.get("PRIORITY_AGING_FACTOR"):
-            value = parse_float(os.environ["PRIORITY_AGING_FACTOR"], "PRIORITY_AGING_FACTOR")
-            if value is not None:
-                set_path(["worker", "priority_aging_factor"], value)
+        value = env.get("PRIORITY_AGING_FACTOR")
+        if value:
+            parsed = parse_float(value, "PRIORITY_AGING_FACTOR")
+            if parsed is not None:
+                set_path(["worker", "priority_aging_factor"], parsed)
 
-        if os.environ.get("METRICS_ADDR"):
-            set_path(["metrics", "addr"], os.environ["METRICS_ADDR"])
+        value = env.get("METRICS_ADDR")
+        if value:
+            set_path(["metrics", "addr"], value)
 
-        if os.environ.get("METRICS_AUTH_TOKEN"):
-            set_path(["metrics", "auth_token"], os.environ["METRICS_AUTH_TOKEN"])
+        value = env.get("METRICS_AUTH_TOKEN")
+        if value:
+            set_path(["metrics", "auth_token"], value)
 
-        if os.environ.get("METRICS_ALLOW_CIDRS"):
-            set_path(
-                ["metrics", "allow_cidrs"],
-                self._parse_comma_list(os.environ["METRICS_ALLOW_CIDRS"]),
-            )
+        value = env.get("METRICS_ALLOW_CIDRS")
+        if value:
+            set_path(["metrics", "allow_cidrs"], self._parse_comma_list(value))
 
-        if os.environ.get("METRICS_TLS_CERT"):
-            set_path(["metrics", "tls_cert"], os.environ["METRICS_TLS_CERT"])
+        value = env.get("METRICS_TLS_CERT")
+        if value:
+            set_path(["metrics", "tls_cert"], value)
 
-        if os.environ.get("METRICS_TLS_KEY"):
-            set_path(["metrics", "tls_key"], os.environ["METRICS_TLS_KEY"])
+        value = env.get("METRICS_TLS_KEY")
+        if value:
+            set_path(["metrics", "tls_key"], value)
 
-        if os.environ.get("METRICS_TLS_CLIENT_CA"):
-            set_path(["metrics", "tls_client_ca"], os.environ["METRICS_TLS_CLIENT_CA"])
+        value = env.get("METRICS_TLS_CLIENT_CA")
+        if value:
+            set_path(["metrics", "tls_client_ca"], value)
 
         return config, errors
 
     def _parse_comma_list(self, value):
         return [item.strip() for item in value.split(",") if item.strip()]
 
-    def _merge_config(self, base, incoming, source, sources, prefix=""):
+    def _merge_config(self, base, incoming, source, sources=None, prefix=""):
+        # sources is None when nothing reports provenance; skip the path
+        # bookkeeping entirely in that case.
+        tracking = sources is not None
         for key, value in incoming.items():
-            path = f"{prefix}{key}"
             if isinstance(value, dict):
                 if key not in base or not isinstance(base.get(key), dict):
                     base[key] = {}
                 if value:
-                    self._merge_config(base[key], value, source, sources, path + ".")
-                elif key not in sources:
-                    sources[path] = source
+                    self._merge_config(
+                        base[key],
+                        value,
+                        source,
+                        sources,
+                        f"{prefix}{key}." if tracking else "",
+                    )
+                elif tracking and key not in sources:
+                    sources[f"{prefix}{key}"] = source
                 continue
 
             if key not in base:
                 base[key] = value
-                sources[path] = source
-                continue
-
-            if value is None:
+            elif value is None:
                 continue
-            if isinstance(value, str):
-                if value == "":
-                    continue
-                base[key] = value
-                sources[path] = source
+            elif isinstance(value, (str, list)) and not value:
                 continue
-            if isinstance(value, list):
-                if not value:
-                    continue
+            else:
                 base[key] = value
-                sources[path] = source
-                continue
-            base[key] = value
-            sources[path] = source
+            if tracking:
+                sources[f"{prefix}{key}"] = source
 
     def _set_default_sources(self, config, sources, source, prefix=""):
-        for key, value in config.items():
-            path = f"{prefix}{key}"
-            if isinstance(value, dict):
-                self._set_default_sources(value, sources, source, path + ".")
-            else:
-                sources[path] = source
+        paths = (path for path, _ in self._flatten_config(config, prefix))
+        sources.update(dict.fromkeys(paths, source))
 
     def _apply_settings_dsn(self, config, sources, dsn, source):
         config["dsn"] = dsn
-        config.setdefault("worker", {})["dsn"] = dsn
-        config.setdefault("beat", {})["dsn"] = dsn
-        sources["dsn"] = source
-        sources["worker.dsn"] = source
-        sources["beat.dsn"] = source
+        for section in ("worker", "beat"):
+            scoped = config.get(section)
+            if scoped is None:
+                scoped = config[section] = {}
+            scoped["dsn"] = dsn
+        if sources is not None:
+            sources["dsn"] = sources["worker.dsn"] = sources["beat.dsn"] = source
+
+    def _build_effective_dsns(self, config):
+        """Map each scope (and None for the top level) to its effective DSN."""
+        return {
+            "worker": self._resolve_effective_dsn(config, "worker"),
+            "beat": self._resolve_effective_dsn(config, "beat"),
+            None: config.get("dsn"),
+        }
 
     def _resolve_effective_dsn(self, config, scope):
-        if scope == "worker":
-            return config.get("worker", {}).get("dsn") or config.get("dsn")
-        if scope == "beat":
-            return config.get("beat", {}).get("dsn") or config.get("dsn")
+        if scope in ("worker", "beat"):
+            scoped = config.get(scope)
+            if scoped is not None:
+                dsn = scoped.get("dsn")
+                if dsn:
+                    return dsn
         return config.get("dsn")
 
     def _select_config_view(self, config, mode):
@@ -2678,64 +3240,190 @@ WantedBy=timers.target
         return config
 
     def _mask_config(self, config):
-        if isinstance(config, dict):
-            return {
-                key: self._mask_config(value)
-                if isinstance(value, (dict, list))
-                else self._mask_value(key, value)
-                for key, value in config.items()
-            }
-        if isinstance(config, list):
-            return [self._mask_config(value) for value in config]
-        return config
+        if not isinstance(config, (dict, list)):
+            return config
+        # Copy containers top-down with an explicit worklist; placeholders are
+        # inserted before descending so key order matches the input. A masked
+        # container depends only on its own contents, so subtrees referenced
+        # more than once are copied once and shared via the id() memo.
+        root = {} if isinstance(config, dict) else []
+        memo = {id(config): root}
+        stack = [(config, root)]
+        while stack:
+            node, out = stack.pop()
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if isinstance(value, (dict, list)):
+                        out[key] = self._mask_child(value, memo, stack)
+                    else:
+                        out[key] = self._mask_value(key, value)
+            else:
+                for value in node:
+                    if isinstance(value, (dict, list)):
+                        out.append(self._mask_child(value, memo, stack))
+                    else:
+                        out.append(value)
+        return root
+
+    def _mask_config_fast(self, config):
+        """Mask the usual two-level config shape without the generic worklist.
+
+        Top-level scalars and section dicts of scalars are handled inline; any
+        other container goes through _mask_config.
+        """
+        if not isinstance(config, dict):
+            return self._mask_config(config)
+        masked = {}
+        for key, value in config.items():
+            if isinstance(value, dict):
+                section = {}
+                for sub_key, sub_value in value.items():
+                    if isinstance(sub_value, (dict, list)):
+                        section[sub_key] = self._mask_config(sub_value)
+                    else:
+                        section[sub_key] = self._mask_value(sub_key, sub_value)
+                masked[key] = section
+            elif isinstance(value, list):
+                masked[key] = self._mask_config(value)
+            else:
+                masked[key] = self._mask_value(key, value)
+        return masked
+
+    def _mask_child(self, value, memo, stack):
+        child = memo.get(id(value))
+        if child is None:
+            child = {} if isinstance(value, dict) else []
+            memo[id(value)] = child
+            stack.append((value, child))
+        return child
 
     def _mask_value(self, path, value):
-        if value is None:
+        # Empty and falsy leaves (None, "", 0, False) are never masked, so skip
+        # classification for them. Truthy non-strings can still be tokens.
+        if not value:
             return value
-        lowered = path.lower()
-        if "dsn" in lowered and isinstance(value, str):
-            return self._mask_dsn(value) if value else value
-        if "auth_token" in lowered or lowered.endswith("token"):
-            return "<redacted>" if value else value
+        category = _classify_path(path)
+        if category & _PATH_DSN and isinstance(value, str):
+            # dsn, worker.dsn and beat.dsn usually hold the same string.
+            masked_dsns = getattr(self, "_masked_dsn_cache", None)
+            if masked_dsns is None:
+                masked_dsns = self._masked_dsn_cache = {}
+            masked = masked_dsns.get(value)
+            if masked is None:
+                masked = masked_dsns[value] = self._mask_dsn(value)
+            return masked
+        if category & _PATH_TOKEN:
+            return "<redacted>"
         return value
 
     def _flatten_config(self, config, prefix=""):
-        items = []
-        if isinstance(config, dict):
-            for key, value in config.items():
-                path = f"{prefix}{key}"
+        """Yield ``(dotted_path, value)`` for each leaf, in key order."""
+        if not isinstance(config, dict):
+            yield prefix.rstrip("."), config
+            return
+        stack = [(prefix, iter(config.items()))]
+        while stack:
+            parent, entries = stack[-1]
+            for key, value in entries:
+                try:
+                    path = parent + key
+                except TypeError:  # YAML allows non-string keys.
+                    path = f"{parent}{key}"
                 if isinstance(value, dict):
-                    items.extend(self._flatten_config(value, path + "."))
-                else:
-                    items.append((path, value))
-        else:
-            items.append((prefix.rstrip("."), config))
-        return items
+                    stack.append((path + ".", iter(value.items())))
+                    break
+                yield path, value
+            else:
+                stack.pop()
 
-    def _read_logs_uri(self, logs_uri, max_bytes):
+    def _local_logs_path(self, logs_uri):
+        """Resolve a logs URI to a local path, or None for http(s) URIs."""
+        # Cheap prefix checks first so common URIs skip the filesystem probe.
+        if logs_uri.startswith(("http://", "https://")):
+            return None
+        if logs_uri.startswith("file://"):
+            from urllib.request import url2pathname
+
+            return url2pathname(urlparse(logs_uri).path)
         if os.path.exists(logs_uri):
-            path = logs_uri
-        else:
-            from urllib.parse import urlparse
+            return logs_uri
+        parsed = urlparse(logs_uri)
+        if parsed.scheme in ("", "file"):
             from urllib.request import url2pathname
 
-            parsed = urlparse(logs_uri)
-            if parsed.scheme in ("", "file"):
-                path = url2pathname(parsed.path)
-            elif parsed.scheme in ("http", "https"):
-                with urllib.request.urlopen(logs_uri) as response:
-                    data = response.read(max_bytes)
-                return data.decode("utf-8", errors="replace")
-            else:
-                raise CommandError(f"Unsupported logs_uri scheme: {parsed.scheme}")
-
-        if not os.path.exists(path):
-            raise CommandError(f"Log path not found: {path}")
-
-        size = os.path.getsize(path)
-        read_size = min(size, max_bytes)
-        with open(path, "rb") as handle:
-            if read_size < size:
-                handle.seek(-read_size, os.SEEK_END)
-            data = handle.read(read_size)
-        return data.decode("utf-8", errors="replace")
+            path = url2pathname(parsed.path)
+        elif parsed.scheme in ("http", "https"):
+            return None
+        else:
+            raise CommandError(f"Unsupported logs_uri scheme: {parsed.scheme}")
+        return path
+
+    def _open_log_file(self, path):
+        try:
+            # O_BINARY keeps Windows from translating line endings.
+            return os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except FileNotFoundError as exc:
+            raise CommandError(f"Log path not found: {path}") from exc
+
+    def _read_logs_uri(self, logs_uri, max_bytes):
+        # Decode chunk by chunk so the raw bytes and the decoded text are never
+        # both held in full.
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parts = []
+        path = self._local_logs_path(logs_uri)
+        if path is None:
+            import urllib.request
+
+            remaining = max_bytes
+            with urllib.request.urlopen(logs_uri) as response:
+                while remaining > 0:
+                    chunk = response.read(min(remaining, 65536))
+                    if not chunk:
+                        break
+                    parts.append(decoder.decode(chunk))
+                    remaining -= len(chunk)
+            parts.append(decoder.decode(b"", final=True))
+            return "".join(parts)
+
+        fd = self._open_log_file(path)
+        try:
+            size = os.fstat(fd).st_size
+            read_size = min(size, max_bytes)
+            offset = size - read_size
+            while read_size > 0:
+                chunk = _pread(fd, min(read_size, 1 << 20), offset)
+                if not chunk:
+                    break
+                parts.append(decoder.decode(chunk))
+                offset += len(chunk)
+                read_size -= len(chunk)
+        finally:
+            os.close(fd)
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
+    def _read_logs_tail(self, logs_uri, tail, max_bytes):
+        """Return the last ``tail`` lines, reading local files from the end."""
+        path = self._local_logs_path(logs_uri)
+        if path is None:
+            return self._read_logs_uri(logs_uri, max_bytes).splitlines()[-tail:]
+
+        fd = self._open_log_file(path)
+        try:
+            end = os.fstat(fd).st_size
+            limit = max(end - max_bytes, 0)
+            chunks = []
+            newlines = 0
+            # tail + 1 newlines guarantees tail complete lines in the buffer.
+            while end > limit and newlines <= tail:
+                start = max(end - 8192, limit)
+                chunk = _pread(fd, end - start, start)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                newlines += chunk.count(b"\n")
+                end = start
+        finally:
+            os.close(fd)
+        data = b"".join(reversed(chunks))
+        return data.decode("utf-8", errors="replace").splitlines()[-tail:]
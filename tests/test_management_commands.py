@@ -1,11 +1,15 @@
+import io
 import os
 import sys
 import json
+import hashlib
 import tempfile
 import tomllib
 import unittest
+import urllib.error
+from datetime import timedelta
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
@@ -27,7 +31,11 @@ if not settings.configured:
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from reproq_django.models import TaskRun
+from django.db import DatabaseError, connections
+from django.db.models import Subquery
+from django.utils import timezone
+from reproq_django.models import PeriodicTask, TaskRun
+from reproq_django.management.commands import reproq as reproq_command
 from reproq_django.management.commands.reproq import Command
 
 
@@ -72,6 +80,40 @@ class TestManagementCommands(unittest.TestCase):
         finally:
             os.unlink(path)
 
+    def test_logs_command_tails_without_pread(self):
+        lines = [f"line{i}" for i in range(3000)]
+        with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+            path = handle.name
+        try:
+            run = self._create_taskrun(spec_hash="w" * 64, logs_uri=path)
+            out = StringIO()
+            # Windows has no os.pread; exercise the seek + read fallback.
+            with patch.object(reproq_command, "_pread", reproq_command._seek_read):
+                call_command(
+                    "reproq", "logs", "--id", str(run.result_id), "--tail", "1500", stdout=out
+                )
+            output = [line.strip() for line in out.getvalue().splitlines() if line.strip()]
+            self.assertEqual(output, lines[-1500:])
+        finally:
+            os.unlink(path)
+
+    def test_logs_command_reads_whole_file_without_pread(self):
+        with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8") as handle:
+            handle.write("line1\nline2\nline3\n")
+            path = handle.name
+        try:
+            run = self._create_taskrun(spec_hash="v" * 64, logs_uri=path)
+            out = StringIO()
+            with patch.object(reproq_command, "_pread", reproq_command._seek_read):
+                call_command(
+                    "reproq", "logs", "--id", str(run.result_id), "--tail", "0", stdout=out
+                )
+            output = [line.strip() for line in out.getvalue().splitlines() if line.strip()]
+            self.assertEqual(output, ["line1", "line2", "line3"])
+        finally:
+            os.unlink(path)
+
     def test_allowlist_write_updates_config(self):
         config_body = '\n'.join(
             [
@@ -172,6 +214,289 @@ class TestManagementCommands(unittest.TestCase):
         for needle in expected:
             self.assertIn(needle, sql)
 
+    def _migrate_worker_schema(self, existing_tables, index_valid=True):
+        command = Command(stdout=StringIO(), stderr=StringIO())
+        with patch.object(
+            Command, "_existing_tables", return_value=set(existing_tables)
+        ), patch.object(
+            Command, "_worker_schema_version", return_value=reproq_command.WORKER_SCHEMA_VERSION
+        ), patch.object(
+            Command, "_spec_unique_index_valid", return_value=index_valid
+        ), patch.object(Command, "_execute_batched") as execute_batched, patch.object(
+            Command, "_backfill_task_path"
+        ), patch.object(Command, "_ensure_spec_unique_index", return_value=True), patch.object(
+            Command, "_record_worker_schema_version"
+        ):
+            command._migrate_worker_schema(MagicMock(), MagicMock(), "default", {})
+        return command.stdout.getvalue(), execute_batched
+
+    def test_migrate_worker_skips_when_version_current_and_tables_exist(self):
+        output, execute_batched = self._migrate_worker_schema(reproq_command._REQUIRED_TABLES)
+        self.assertIn("already up to date", output)
+        execute_batched.assert_not_called()
+
+    def test_migrate_worker_reapplies_when_tables_missing_despite_version(self):
+        present = [t for t in reproq_command._REQUIRED_TABLES if t != "task_runs"]
+        output, execute_batched = self._migrate_worker_schema(present)
+        self.assertNotIn("already up to date", output)
+        self.assertIn("missing: task_runs", output)
+        self.assertTrue(execute_batched.called)
+
+    def test_migrate_worker_reapplies_when_spec_index_invalid(self):
+        output, execute_batched = self._migrate_worker_schema(
+            reproq_command._REQUIRED_TABLES, index_valid=False
+        )
+        self.assertNotIn("already up to date", output)
+        self.assertTrue(execute_batched.called)
+
+    def _ensure_spec_unique_index(self, duplicates):
+        command = Command(stdout=StringIO(), stderr=StringIO())
+        cursor = MagicMock()
+        cursor.fetchall.return_value = duplicates
+        with patch.object(Command, "_spec_unique_index_valid", return_value=False):
+            built = command._ensure_spec_unique_index(cursor)
+        executed = [" ".join(c.args[0].split()) for c in cursor.execute.call_args_list]
+        return built, executed, command.stderr.getvalue()
+
+    def test_ensure_spec_unique_index_rebuilds_invalid_index(self):
+        built, executed, _ = self._ensure_spec_unique_index([])
+        self.assertTrue(built)
+        self.assertTrue(executed[0].startswith("DROP INDEX CONCURRENTLY"))
+        self.assertTrue(executed[-1].startswith("CREATE UNIQUE INDEX CONCURRENTLY"))
+
+    def test_ensure_spec_unique_index_reports_duplicates(self):
+        built, executed, err = self._ensure_spec_unique_index([("abc123", 2)])
+        self.assertFalse(built)
+        self.assertFalse(any(sql.startswith("CREATE UNIQUE INDEX") for sql in executed))
+        self.assertIn("abc123 (2)", err)
+
+    def test_pg_cron_install_requires_valid_spec_index(self):
+        conn = MagicMock(vendor="postgresql")
+        with patch.object(reproq_command, "connections", {"default": conn}), patch.object(
+            Command, "_existing_tables", return_value={"periodic_tasks"}
+        ), patch.object(
+            Command, "_spec_unique_index_valid", return_value=False
+        ), patch.object(Command, "_ensure_pg_cron_function") as ensure_function:
+            with self.assertRaises(CommandError) as ctx:
+                call_command("reproq", "pg-cron", "--install", stdout=StringIO())
+        self.assertIn("idx_task_runs_spec_unique", str(ctx.exception))
+        ensure_function.assert_not_called()
+
+    def test_pg_cron_collision_names_follow_task_name_order(self):
+        PeriodicTask.objects.all().delete()
+        for name in ("nightly.b", "nightly b"):
+            PeriodicTask.objects.create(
+                name=name,
+                cron_expr="0 3 * * *",
+                task_path="myapp.tasks.nightly",
+                next_run_at=timezone.now(),
+            )
+        out = StringIO()
+        Command(stdout=out)._schedule_pg_cron_jobs(MagicMock(), "reproq", True, True)
+        PeriodicTask.objects.all().delete()
+        lines = out.getvalue().splitlines()
+        self.assertIn("reproq_nightly_b 0 3 * * * -> SELECT reproq_enqueue_periodic_task('nightly b');", lines[0])
+        self.assertIn("reproq_nightly_b_1 0 3 * * * -> SELECT reproq_enqueue_periodic_task('nightly.b');", lines[1])
+
+    def test_threaded_enqueue_reconnects_once_per_thread(self):
+        task = MagicMock()
+        with patch.object(reproq_command.connections, "close_all") as close_all:
+            Command()._threaded_enqueue(task, 1001, 4, sleep_seconds=0)
+        self.assertEqual(task.enqueue.call_count, 1001)
+        task.enqueue.assert_called_with(sleep_seconds=0)
+        self.assertEqual(close_all.call_count, 4)
+
+    def _create_finished_runs(self, count, status="SUCCESSFUL"):
+        now = timezone.now()
+        return [
+            self._create_taskrun(
+                spec_hash=f"{i:064d}",
+                status=status,
+                finished_at=now - timedelta(days=30 + i),
+            )
+            for i in range(count)
+        ]
+
+    def test_delete_task_runs_honours_limit_across_batches(self):
+        runs = self._create_finished_runs(7)
+        queryset = TaskRun.objects.filter(status="SUCCESSFUL")
+        deleted = Command()._delete_task_runs(
+            queryset, "default", ("finished_at", "result_id"), limit=5, batch_size=2
+        )
+        self.assertEqual(deleted, 5)
+        # Oldest first: the two most recent runs survive.
+        remaining = set(TaskRun.objects.values_list("result_id", flat=True))
+        self.assertEqual(remaining, {runs[0].result_id, runs[1].result_id})
+
+    def test_delete_task_runs_detaches_children(self):
+        (parent,) = self._create_finished_runs(1)
+        child = self._create_taskrun(spec_hash="d" * 64, parent=parent)
+        deleted = Command()._delete_task_runs(
+            TaskRun.objects.filter(status="SUCCESSFUL"), "default", ("finished_at", "result_id")
+        )
+        self.assertEqual(deleted, 1)
+        child.refresh_from_db()
+        self.assertIsNone(child.parent_id)
+
+    def test_prune_successful_dry_run_reports_limited_count(self):
+        self._create_finished_runs(5)
+        for limit, expected in (("3", 3), ("10", 5)):
+            out = StringIO()
+            call_command(
+                "reproq", "prune-successful", "--older-than", "1d", "--limit", limit, "--dry-run",
+                stdout=out,
+            )
+            self.assertIn(f"Dry run: {expected} task(s) would be deleted.", out.getvalue())
+        self.assertEqual(TaskRun.objects.count(), 5)
+
+    def test_prune_loop_once_runs_each_step_with_mapped_options(self):
+        with patch.object(Command, "run_reclaim") as reclaim, patch.object(
+            Command, "run_prune_workers"
+        ) as prune_workers, patch.object(Command, "run_prune_successful") as prune_successful:
+            call_command(
+                "reproq",
+                "prune-loop",
+                "--once",
+                "--reclaim-action",
+                "fail",
+                "--reclaim-older-than",
+                "5m",
+                "--workers-older-than",
+                "1h",
+                "--successful-older-than",
+                "3d",
+                "--limit",
+                "100",
+                stdout=StringIO(),
+            )
+        reclaim_options = reclaim.call_args.args[0]
+        self.assertEqual(reclaim_options["action"], "fail")
+        self.assertEqual(reclaim_options["older_than"], "5m")
+        self.assertEqual(reclaim_options["limit"], 100)
+        self.assertEqual(prune_workers.call_args.args[0]["older_than"], "1h")
+        successful_options = prune_successful.call_args.args[0]
+        self.assertEqual(successful_options["older_than"], "3d")
+        self.assertEqual(successful_options["limit"], 100)
+
+    def test_prune_loop_survives_database_errors(self):
+        err = StringIO()
+        with patch.object(
+            Command, "run_reclaim", side_effect=[DatabaseError("server closed"), KeyboardInterrupt]
+        ) as reclaim, patch.object(Command, "run_prune_workers"), patch.object(
+            Command, "run_prune_successful"
+        ), patch("time.sleep"):
+            call_command("reproq", "prune-loop", stdout=StringIO(), stderr=err)
+        self.assertEqual(reclaim.call_count, 2)
+        self.assertIn("server closed", err.getvalue())
+
+    def test_reclaim_fail_sql_compiles_for_queryset_alias(self):
+        connections.settings["secondary"] = dict(connections.settings["default"])
+        try:
+            candidates = (
+                TaskRun.objects.using("secondary")
+                .filter(status="RUNNING")
+                .values("result_id")
+                .select_for_update(skip_locked=True)
+            )
+            queryset = TaskRun.objects.using("secondary").filter(
+                result_id__in=Subquery(candidates)
+            )
+            # Compiling against "default" (in autocommit) would reject the
+            # FOR UPDATE subquery; the reclaimed alias must be used instead.
+            with patch.object(connections["default"].features, "has_select_for_update", True):
+                sql, params = Command()._reclaim_fail_sql(
+                    queryset, "secondary", timezone.now(), {"kind": "reclaim"}
+                )
+            self.assertIn("UPDATE task_runs", sql)
+            self.assertNotIn("FOR UPDATE", sql)
+            self.assertIn("RUNNING", params)
+        finally:
+            connections["secondary"].close()
+            del connections["secondary"]
+            del connections.settings["secondary"]
+
+
+class _FakeRelease:
+    """Stand-in for the GitHub release endpoints used by ``install``."""
+
+    def __init__(self, payload, etag="v2-etag"):
+        self.payload = payload
+        self.etag = etag
+        self.binary_requests = []
+
+    def urlopen(self, request, timeout=None):
+        url = getattr(request, "full_url", request)
+        if url.endswith(".sha256"):
+            return io.BytesIO(hashlib.sha256(self.payload).hexdigest().encode())
+        if_none_match = request.get_header("If-none-match")
+        self.binary_requests.append(if_none_match)
+        if if_none_match == self.etag:
+            raise urllib.error.HTTPError(url, 304, "Not Modified", {}, None)
+        response = io.BytesIO(self.payload)
+        response.headers = {"ETag": self.etag}
+        return response
+
+
+class TestInstallCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.target = os.path.join(self.tmp.name, "bin", "reproq")
+        env = patch.dict(
+            os.environ,
+            {"XDG_CACHE_HOME": os.path.join(self.tmp.name, "cache"), "REPROQ_WORKER_BIN": self.target},
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _seed_cache(self, tag, payload, sha256=None, etag=None, binary=True):
+        cached_path = Command()._binary_cache_dir(tag)
+        os.makedirs(cached_path, exist_ok=True)
+        cached_path = os.path.join(cached_path, reproq_command._BIN_NAME)
+        if binary:
+            with open(cached_path, "wb") as f:
+                f.write(payload)
+        with open(f"{cached_path}.sha256", "w") as f:
+            f.write(sha256 or hashlib.sha256(payload).hexdigest())
+        if etag:
+            with open(f"{cached_path}.etag", "w") as f:
+                f.write(etag)
+        return cached_path
+
+    def _install(self, release, *args):
+        with patch("urllib.request.urlopen", side_effect=release.urlopen), patch.object(
+            reproq_command.subprocess, "run"
+        ):
+            call_command("reproq", "install", *args, stdout=StringIO(), stderr=StringIO())
+        with open(self.target, "rb") as f:
+            return f.read()
+
+    def test_pinned_tag_uses_cache_without_network(self):
+        self._seed_cache("v1.0.0", b"cached")
+        release = _FakeRelease(b"remote")
+        self.assertEqual(self._install(release, "--tag", "v1.0.0"), b"cached")
+        self.assertEqual(release.binary_requests, [])
+
+    def test_corrupt_cache_entry_is_replaced_by_download(self):
+        cached_path = self._seed_cache("v1.0.0", b"cached", sha256="0" * 64)
+        release = _FakeRelease(b"remote")
+        self.assertEqual(self._install(release, "--tag", "v1.0.0"), b"remote")
+        self.assertEqual(release.binary_requests, [None])
+        with open(f"{cached_path}.sha256") as f:
+            self.assertEqual(f.read(), hashlib.sha256(b"remote").hexdigest())
+
+    def test_latest_not_modified_uses_cache(self):
+        self._seed_cache("latest", b"cached", etag="v2-etag")
+        release = _FakeRelease(b"remote")
+        self.assertEqual(self._install(release), b"cached")
+        self.assertEqual(release.binary_requests, ["v2-etag"])
+
+    def test_latest_not_modified_without_cached_binary_downloads(self):
+        self._seed_cache("latest", b"cached", etag="v2-etag", binary=False)
+        release = _FakeRelease(b"remote")
+        self.assertEqual(self._install(release), b"remote")
+        self.assertEqual(release.binary_requests, ["v2-etag", None])
+
 
 if __name__ == "__main__":
     unittest.main()